@@ -0,0 +1,177 @@
+import argparse
+import csv
+
+import numpy as np
+
+
+# Characters are stored as uint8 codes, with 0 used to pad shorter words.
+PAD = 0
+
+
+def encode_words(words, length=None):
+    """
+    Encode a list of ASCII words as a (n_words, length) uint8 array, padding
+    shorter words with PAD.
+
+    Args:
+        words [string]: The words to encode.
+        length (int=None): The width of the array. Defaults to the longest
+            word.
+
+    Returns:
+        (np.ndarray): The encoded words.
+    """
+    if length is None:
+        length = max((len(w) for w in words), default=0)
+    if all(len(w) == length for w in words):
+        # Fast path: every word fills its row, so decode one joined buffer.
+        data = ''.join(words).encode('ascii')
+        return np.frombuffer(data, dtype=np.uint8).reshape(len(words), length)
+
+    encoded = np.full((len(words), length), PAD, dtype=np.uint8)
+    for i, word in enumerate(words):
+        encoded[i, :len(word)] = np.frombuffer(
+            word.encode('ascii'), dtype=np.uint8
+        )
+    return encoded
+
+
+def encode_ladders(ladders):
+    """
+    Encode ladders as a (n_ladders, steps, length) uint8 array.
+
+    Args:
+        ladders [[string]]: The ladders to encode. Every ladder must have the
+            same number of words.
+
+    Returns:
+        (np.ndarray): The encoded ladders.
+    """
+    if not ladders:
+        return np.zeros((0, 0, 0), dtype=np.uint8)
+    steps = len(ladders[0])
+    if any(len(ladder) != steps for ladder in ladders):
+        raise ValueError('Every ladder must have the same number of words.')
+    words = [word for ladder in ladders for word in ladder]
+    encoded = encode_words(words)
+    return encoded.reshape(len(ladders), steps, encoded.shape[1])
+
+
+def encoded_distances(first, second):
+    """
+    The letter-by-letter distance (see graph.word_diff) between encoded
+    words, compared along the last axis. Padding only matches padding, so a
+    difference in length counts once per missing letter.
+    """
+    return np.count_nonzero(first != second, axis=-1)
+
+
+def pair_distances(encoded):
+    """
+    The distance between every pair of adjacent words in encoded ladders.
+
+    Args:
+        encoded (np.ndarray): The output of encode_ladders.
+
+    Returns:
+        (np.ndarray): A (n_ladders, steps - 1) array of distances.
+    """
+    return encoded_distances(encoded[:, :-1], encoded[:, 1:])
+
+
+def validate_ladders(ladders):
+    """
+    Check a batch of ladders for adjacent words that are more than 1 apart
+    (the batch version of graph.is_valid_sequence, without printing).
+
+    Args:
+        ladders [[string]]: The ladders to check. Every ladder must have the
+            same number of words.
+
+    Returns:
+        (np.ndarray, np.ndarray): A boolean mask of which ladders are valid,
+            and a structured array with one record per failing pair: the
+            ladder index, the step index, both words and their distance.
+    """
+    encoded = encode_ladders(ladders)
+    distances = pair_distances(encoded)
+    bad = distances > 1
+    mask = ~bad.any(axis=1)
+
+    ladder_index, step_index = np.nonzero(bad)
+    width = encoded.shape[2] if encoded.size else 1
+    failures = np.zeros(len(ladder_index), dtype=[
+        ('ladder', np.int64),
+        ('step', np.int64),
+        ('first', 'U{}'.format(width)),
+        ('second', 'U{}'.format(width)),
+        ('distance', np.int64),
+    ])
+    failures['ladder'] = ladder_index
+    failures['step'] = step_index
+    failures['first'] = [ladders[i][j] for i, j in zip(ladder_index, step_index)]
+    failures['second'] = [
+        ladders[i][j + 1] for i, j in zip(ladder_index, step_index)
+    ]
+    failures['distance'] = distances[ladder_index, step_index]
+    return mask, failures
+
+
+def batch_distance(w1s, w2s):
+    """
+    The batch version of ladder_builder.distance: the distance between each
+    pair of words in two equal-length lists.
+
+    Args:
+        w1s [string]: The first word of each pair.
+        w2s [string]: The second word of each pair.
+
+    Returns:
+        (np.ndarray): The distance for each pair.
+    """
+    if len(w1s) != len(w2s):
+        raise ValueError('Both word lists must be the same length.')
+    length = max((len(w) for w in list(w1s) + list(w2s)), default=0)
+    return encoded_distances(
+        encode_words(w1s, length), encode_words(w2s, length)
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Validate every ladder in a generated ladders CSV.'
+    )
+    parser.add_argument('csv_path', help='The generated ladders CSV to check')
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    with open(args.csv_path, 'r') as input_file:
+        ladders = [
+            row['sequence'].split(' ') for row in csv.DictReader(input_file)
+        ]
+
+    # Ladders of different lengths are checked in separate batches.
+    by_length = {}
+    for i, ladder in enumerate(ladders):
+        by_length.setdefault(len(ladder), []).append(i)
+
+    invalid = 0
+    for indexes in by_length.values():
+        mask, failures = validate_ladders([ladders[i] for i in indexes])
+        invalid += int((~mask).sum())
+        for failure in failures:
+            print('Ladder {}: {} and {} are {} apart.'.format(
+                indexes[failure['ladder']],
+                failure['first'],
+                failure['second'],
+                failure['distance']
+            ))
+    print('{} of {} ladders are valid.'.format(
+        len(ladders) - invalid, len(ladders)
+    ))
+
+
+if __name__ == '__main__':
+    main()
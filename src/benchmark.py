@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+
+import build_graph
+import csr_graph
+import graph
+import ladder_builder
+import ladder_walker
+import rank_table
+import word_ranker
+
+
+file_path = os.path.dirname(os.path.abspath(__file__))
+GRAPH_PATH = os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json')
+WORD_RANK_PATH = os.path.join(
+    file_path, '..', 'data', 'word_rankings', 'word_rank.json'
+)
+SAMPLES_PATH = os.path.join(
+    file_path, '..', 'data', 'writing_samples', 'files'
+)
+
+# Rough English letter frequencies, so synthetic dictionaries have a graph
+# shaped more like a real one than uniformly random letters would give.
+LETTER_WEIGHTS = [
+    8.2, 1.5, 2.8, 4.3, 12.7, 2.2, 2.0, 6.1, 7.0, 0.2, 0.8, 4.0, 2.4,
+    6.7, 7.5, 1.9, 0.1, 6.0, 6.3, 9.1, 2.8, 1.0, 2.4, 0.2, 2.0, 0.1
+]
+
+
+def time_best(function, repeat):
+    """
+    Run `function` `repeat` times and return the fastest run in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def synthetic_words(count, length=5, seed=0):
+    """
+    Generate a reproducible dictionary of `count` distinct random words.
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choices(
+            string.ascii_lowercase, weights=LETTER_WEIGHTS, k=length
+        )))
+    return sorted(words)
+
+
+def _start_words(g, count, seed):
+    rng = random.Random(seed)
+    candidates = sorted(w for w in g.vertices() if g.has_children(w))
+    return [rng.choice(candidates) for _ in range(count)]
+
+
+def bench_graph_load(results, repeat):
+    def load_dict():
+        graph.Graph().load_graph(GRAPH_PATH)
+
+    def load_csr():
+        csr_graph.CSRGraph().load_graph(GRAPH_PATH)
+
+    results['graph_load.json_dict'] = time_best(load_dict, repeat)
+    results['graph_load.json_csr'] = time_best(load_csr, repeat)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        binary_path = os.path.join(temp_dir, 'graph.bin')
+        g = csr_graph.CSRGraph()
+        g.load_graph(GRAPH_PATH)
+        g.save_binary(binary_path)
+
+        def load_binary():
+            csr_graph.CSRGraph().load_graph(binary_path)
+
+        results['graph_load.binary_csr'] = time_best(load_binary, repeat)
+
+
+def bench_walk(results, repeat, seed, walks, steps_values):
+    dict_graph = graph.Graph()
+    dict_graph.load_graph(GRAPH_PATH)
+    g = csr_graph.CSRGraph()
+    g.load_graph(GRAPH_PATH)
+    starts = _start_words(g, walks, seed)
+
+    for steps in steps_values:
+        walker = ladder_walker.LadderWalker(g, steps)
+
+        def walk_dict():
+            random.seed(seed)
+            for start in starts:
+                dict_graph.get_random_destination_from_node(start, steps)
+
+        def walk_walker():
+            rng = random.Random(seed)
+            for start in starts:
+                walker.walk(start, steps, rng)
+
+        results['walk.graph.steps_{}'.format(steps)] = \
+            time_best(walk_dict, repeat)
+        results['walk.ladder_walker.steps_{}'.format(steps)] = \
+            time_best(walk_walker, repeat)
+
+
+def bench_solve(results, repeat, seed, pairs):
+    g = csr_graph.CSRGraph()
+    g.load_graph(GRAPH_PATH)
+    rng = random.Random(seed)
+    words = sorted(g.vertices())
+    queries = [(rng.choice(words), rng.choice(words)) for _ in range(pairs)]
+
+    def solve():
+        for start, end in queries:
+            g.shortest_ladder(start, end)
+
+    results['solve.shortest_ladder'] = time_best(solve, repeat)
+
+
+def _sample_sequences(count, seed):
+    g = csr_graph.CSRGraph()
+    g.load_graph(GRAPH_PATH)
+    walker = ladder_walker.LadderWalker(g, 5)
+    rng = random.Random(seed)
+    sequences = []
+    for start in _start_words(g, count, seed):
+        ladder = walker.walk(start, 5, rng)
+        if ladder:
+            sequences.append(ladder)
+    return sequences
+
+
+def bench_rank_and_save(results, repeat, seed, ladders):
+    with open(WORD_RANK_PATH, 'r') as input_words:
+        word_rankings = json.load(input_words)
+    rank_average = rank_table.average_rank(word_rankings)
+    sequences = _sample_sequences(ladders, seed)
+
+    def rank():
+        for sequence in sequences:
+            ladder_builder.calculate_rank(sequence, word_rankings, rank_average)
+
+    results['calculate_rank'] = time_best(rank, repeat)
+
+    g = csr_graph.CSRGraph()
+    g.load_graph(GRAPH_PATH)
+    ranks = rank_table.rank_array(g, word_rankings, rank_average)
+
+    def rank_batch():
+        rank_table.rank_ladders(g, ranks, sequences)
+
+    results['rank_ladders'] = time_best(rank_batch, repeat)
+
+    ranked = [
+        ladder_builder.SequenceRank(
+            s, ladder_builder.calculate_rank(s, word_rankings, rank_average)
+        )
+        for s in sequences
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        save_path = os.path.join(temp_dir, 'ladders.csv')
+
+        def save():
+            ladder_builder.save_sequences(ranked, save_path)
+
+        results['save_sequences'] = time_best(save, repeat)
+
+
+def bench_corpus(results, repeat):
+    def rank_corpus():
+        word_ranker.load_words_in_directory(SAMPLES_PATH)
+
+    results['word_ranker.load_words_in_directory'] = \
+        time_best(rank_corpus, repeat)
+
+
+def bench_synthetic(results, repeat, seed, sizes, walks):
+    for size in sizes:
+        words = synthetic_words(size, seed=seed)
+        prefix = 'synthetic_{}'.format(size)
+
+        start = time.perf_counter()
+        g = build_graph.build_graph(words)
+        results[prefix + '.build_graph'] = time.perf_counter() - start
+
+        compact = csr_graph.CSRGraph.from_graph(g)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            binary_path = os.path.join(temp_dir, 'graph.bin')
+            compact.save_binary(binary_path)
+
+            def load_binary():
+                csr_graph.CSRGraph().load_graph(binary_path)
+
+            results[prefix + '.load_binary'] = time_best(load_binary, repeat)
+
+        walker = ladder_walker.LadderWalker(compact, 5)
+        starts = _start_words(compact, walks, seed)
+
+        def walk():
+            rng = random.Random(seed)
+            for start_word in starts:
+                walker.walk(start_word, 5, rng)
+
+        results[prefix + '.walk.steps_5'] = time_best(walk, repeat)
+
+
+def run(seed=0, repeat=3, walks=2000, pairs=1000, ladders=5000,
+        steps_values=(3, 5, 7, 9), sizes=(10000, 100000, 500000)):
+    """
+    Run every benchmark.
+
+    Returns:
+        (dict): {benchmark name: seconds}.
+    """
+    results = {}
+    bench_graph_load(results, repeat)
+    bench_walk(results, repeat, seed, walks, steps_values)
+    bench_solve(results, repeat, seed, pairs)
+    bench_rank_and_save(results, repeat, seed, ladders)
+    bench_corpus(results, repeat)
+    bench_synthetic(results, repeat, seed, sizes, walks)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find benchmarks that got slower than a previous run.
+
+    Args:
+        results {string: double}: The current timings.
+        baseline {string: double}: The timings to compare against.
+        threshold (double): How much slower (as a fraction) counts as a
+            regression.
+
+    Returns:
+        [(string, double, double)]: (name, old seconds, new seconds) for each
+            regression.
+    """
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        old = baseline.get(name)
+        if old and seconds > old * (1 + threshold):
+            regressions.append((name, old, seconds))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Run the word ladder benchmarks and save them as JSON.'
+    )
+    parser.add_argument(
+        '--output', default='benchmark.json', help='Where to write results'
+    )
+    parser.add_argument(
+        '--compare',
+        default=None,
+        help='A previous results file to flag regressions against'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.2,
+        help='Slowdown (as a fraction) that counts as a regression'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[10000, 100000, 500000],
+        help='Synthetic dictionary sizes'
+    )
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='Fewer repeats and only the smallest synthetic dictionary'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    repeat = args.repeat
+    sizes = args.sizes
+    if args.quick:
+        repeat = 1
+        sizes = [min(sizes)]
+
+    results = run(seed=args.seed, repeat=repeat, sizes=sizes)
+    output = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(output, output_file, indent=2, sort_keys=True)
+
+    for name, seconds in sorted(results.items()):
+        print('{:<45} {:.6f}s'.format(name, seconds))
+
+    if args.compare:
+        with open(args.compare, 'r') as input_file:
+            baseline = json.load(input_file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new in regressions:
+            print('REGRESSION {}: {:.6f}s -> {:.6f}s'.format(name, old, new))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
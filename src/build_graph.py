@@ -0,0 +1,166 @@
+import argparse
+import os
+import time
+
+import graph
+
+
+def load_word_list(path):
+    """
+    Load a word list file into a sorted list of unique words (one word per
+    line).
+
+    Args:
+        path (string): The path to the word list.
+
+    Returns:
+        [string]: The sorted, de-duplicated words in the file.
+    """
+    words = set()
+    with open(path, 'r') as words_file:
+        for line in words_file:
+            word = line.strip()
+            if word:
+                words.add(word)
+    return sorted(words)
+
+
+def build_graph(words):
+    """
+    Build the word graph by indexing every word under its one-letter wildcard
+    patterns ("_ater", "w_ter", ...). Words sharing a pattern differ by exactly
+    one letter, so each bucket only holds words that are adjacent to one
+    another. This runs in roughly O(n*L) rather than the O(n^2) of comparing
+    every pair of words.
+
+    Args:
+        words [string]: The words to add to the graph.
+
+    Returns:
+        (graph.Graph): A graph with a bidirectional edge between every pair of
+            words that are a distance of 1 apart.
+    """
+    words = sorted(set(words))
+    g = graph.Graph()
+    # Isolated words still need to be in the graph (with no edges).
+    g.add_vertices(words)
+
+    buckets = {}
+    for word in words:
+        for pattern in graph.wildcard_patterns(word):
+            if pattern in buckets:
+                buckets[pattern].append(word)
+            else:
+                buckets[pattern] = [word]
+
+    for bucket in buckets.values():
+        for i in range(len(bucket)):
+            for j in range(i + 1, len(bucket)):
+                g.add_edge(bucket[i], bucket[j], bidirectional=True)
+
+    # Keep the adjacency lists in a stable order so the saved graph doesn't
+    # depend on the order the buckets were visited in.
+    for edges in g.edges.values():
+        edges.sort()
+
+    return g
+
+
+def build_graph_pairwise(words):
+    """
+    Build the word graph by comparing every pair of words with
+    graph.word_diff. This is the original (quadratic) approach and is only
+    kept around as a reference for checking build_graph.
+
+    Args:
+        words [string]: The words to add to the graph.
+
+    Returns:
+        (graph.Graph): A graph with a bidirectional edge between every pair of
+            words that are a distance of 1 apart.
+    """
+    words = sorted(set(words))
+    g = graph.Graph()
+    g.add_vertices(words)
+    for i in range(len(words)):
+        for j in range(i + 1, len(words)):
+            if graph.word_diff(words[i], words[j]) == 1:
+                g.add_edge(words[i], words[j], bidirectional=True)
+    return g
+
+
+def benchmark(words):
+    """
+    Time the wildcard builder against the pairwise builder and check that they
+    produce the same graph.
+
+    Args:
+        words [string]: The words to build graphs from.
+
+    Returns:
+        (dict): The timings for each builder and whether the outputs match.
+    """
+    start = time.perf_counter()
+    bucket_graph = build_graph(words)
+    bucket_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairwise_graph = build_graph_pairwise(words)
+    pairwise_time = time.perf_counter() - start
+
+    return {
+        'words': len(bucket_graph.edges),
+        'edges': sum(len(e) for e in bucket_graph.edges.values()),
+        'wildcard_seconds': bucket_time,
+        'pairwise_seconds': pairwise_time,
+        'speedup': pairwise_time / bucket_time if bucket_time else 0.0,
+        'matches': bucket_graph.edges == pairwise_graph.edges,
+    }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Build graph.json from a word list.'
+    )
+    parser.add_argument(
+        '--words',
+        default=os.path.join(
+            file_path, '..', 'data', 'word_lists',
+            'even_more_five_letter_words.txt'
+        ),
+        help='The word list to build the graph from'
+    )
+    parser.add_argument(
+        '--output',
+        default=os.path.join(file_path, '..', 'data', 'graph_data'),
+        help='The directory to write graph.json to'
+    )
+    parser.add_argument(
+        '--benchmark',
+        action='store_true',
+        help='Compare against the pairwise builder instead of saving'
+    )
+    return parser
+
+
+def main():
+    """
+    Build the word graph used by create_word_ladder from a word list and save
+    it as graph.json.
+    """
+    args = build_parser().parse_args()
+    words = load_word_list(args.words)
+
+    if args.benchmark:
+        results = benchmark(words)
+        for key, value in results.items():
+            print('{}: {}'.format(key, value))
+        return
+
+    g = build_graph(words)
+    g.save_graph(args.output)
+
+
+if __name__ == '__main__':
+    main()
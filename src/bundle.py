@@ -0,0 +1,365 @@
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+import components
+import csr_graph
+import graph_delta
+import rank_table
+
+
+# Startup bundle layout (little-endian):
+#   header:     magic, format version, vertex count, neighbor count, start
+#               word count, word table size in bytes, rank_average, SHA-256
+#               of everything after the header, SHA-256 of the source files
+#   ranks:      vertex count float64 ranks (NaN for unranked words)
+#   offsets:    vertex count + 1 int32 CSR row offsets
+#   neighbors:  neighbor count int32 vertex ids
+#   components: vertex count int32 component ids
+#   sizes:      vertex count int32 component sizes
+#   starts:     start word count int32 vertex ids
+#   word table: the words, UTF-8, separated by newlines
+BUNDLE_MAGIC = b'WLSB'
+BUNDLE_VERSION = 1
+# Padded so the float64 ranks that follow it are 8-byte aligned.
+BUNDLE_HEADER = struct.Struct('<4sIIIIId32s32s8x')
+
+
+def bundle_sources(graph_path, words_path, word_rank_path):
+    """
+    The files a bundle is compiled from: the graph, its delta log (if there
+    is one, since loading the graph replays it), the word list and the word
+    rankings.
+    """
+    sources = [graph_path]
+    if os.path.exists(graph_delta.delta_path(graph_path)):
+        sources.append(graph_delta.delta_path(graph_path))
+    return sources + [words_path, word_rank_path]
+
+
+def source_digest(paths):
+    """
+    A SHA-256 over the contents of the files a bundle was compiled from (see
+    bundle_sources), so a stale bundle can be spotted.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as input_file:
+            digest.update(hashlib.sha256(input_file.read()).digest())
+    return digest.digest()
+
+
+def compile_bundle(graph_path, words_path, word_rank_path, output_path):
+    """
+    Merge the graph, the start word list, the word rankings and the values
+    derived from them (component labels and rank_average) into one bundle
+    file.
+
+    Args:
+        graph_path (string): The graph to bundle (JSON or binary). Any delta
+            log is replayed first.
+        words_path (string): The word list start words are drawn from.
+        word_rank_path (string): The word_rank.json to bundle.
+        output_path (string): Where to write the bundle.
+    """
+    g = csr_graph.CSRGraph()
+    g.load_graph(graph_path)
+    index = components.ComponentIndex.compute(g)
+
+    with open(words_path, 'r') as words_file:
+        start_words = {x.strip() for x in words_file.readlines()}
+    with open(word_rank_path, 'r') as input_words:
+        word_rankings = json.load(input_words)
+    rank_average = rank_table.average_rank(word_rankings)
+
+    ranks = array('d', (word_rankings.get(w, math.nan) for w in g.words))
+    component_ids = array('i', (index.component(w) for w in g.words))
+    component_sizes = array('i', (index.component_size(w) for w in g.words))
+    starts = array('i', sorted(g.ids[w] for w in start_words if w in g.ids))
+    if sys.byteorder != 'little':
+        ranks.byteswap()
+    word_table = '\n'.join(g.words).encode('utf-8')
+
+    payload = b''.join([
+        ranks.tobytes(),
+        csr_graph._int_bytes(g.offsets),
+        csr_graph._int_bytes(g.neighbors),
+        csr_graph._int_bytes(component_ids),
+        csr_graph._int_bytes(component_sizes),
+        csr_graph._int_bytes(starts),
+        word_table,
+    ])
+
+    temp_path = '{}.tmp'.format(output_path)
+    with open(temp_path, 'wb') as output_file:
+        output_file.write(BUNDLE_HEADER.pack(
+            BUNDLE_MAGIC,
+            BUNDLE_VERSION,
+            len(g.words),
+            len(g.neighbors),
+            len(starts),
+            len(word_table),
+            rank_average,
+            hashlib.sha256(payload).digest(),
+            source_digest(
+                bundle_sources(graph_path, words_path, word_rank_path)
+            )
+        ))
+        output_file.write(payload)
+    os.replace(temp_path, output_path)
+
+
+class Bundle():
+    """
+    A compiled startup bundle (see compile_bundle). Opening one only maps the
+    file and checks its header and hash; the graph, rankings, component index
+    and start words are each built from the mapped arrays the first time
+    they're used.
+    """
+    def __init__(self, path, verify=True, sources=None):
+        """
+        Args:
+            path (string): The bundle file.
+            verify (bool=True): Check the payload against the hash stored in
+                the header.
+            sources [string]: If given, the files the bundle should have been
+                compiled from (see bundle_sources). Raises ValueError if any
+                of them has changed since it was.
+        """
+        self.path = path
+        with open(path, 'rb') as input_file:
+            self._mapped = mmap.mmap(
+                input_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+        magic, version, vertex_count, neighbor_count, start_count, \
+            word_bytes, rank_average, payload_hash, self.source_hash = \
+            BUNDLE_HEADER.unpack_from(self._mapped, 0)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError('{} is not a startup bundle.'.format(path))
+        if version != BUNDLE_VERSION:
+            raise ValueError(
+                'Unsupported bundle version {} in {}; recompile it.'.format(
+                    version, path
+                )
+            )
+        if verify and hashlib.sha256(
+                memoryview(self._mapped)[BUNDLE_HEADER.size:]
+        ).digest() != payload_hash:
+            raise ValueError('{} is corrupt (hash mismatch).'.format(path))
+        if sources is not None and not self.is_current(sources):
+            raise ValueError(
+                '{} is out of date with its sources; recompile it.'.format(
+                    path
+                )
+            )
+
+        self.rank_average = rank_average
+        self._counts = (vertex_count, neighbor_count, start_count, word_bytes)
+        self._word_list = None
+        self._graph = None
+        self._word_rankings = None
+        self._components = None
+        self._start_words = None
+
+    def is_current(self, sources):
+        """
+        Whether the bundle was compiled from the current contents of
+        `sources` (see bundle_sources).
+        """
+        return self.source_hash == source_digest(sources)
+
+    def _sections(self):
+        vertex_count, neighbor_count, start_count, word_bytes = self._counts
+        position = BUNDLE_HEADER.size
+        sections = {}
+        sections['ranks'] = (position, vertex_count)
+        position += vertex_count * 8
+        for name, count in (('offsets', vertex_count + 1),
+                            ('neighbors', neighbor_count),
+                            ('components', vertex_count),
+                            ('sizes', vertex_count),
+                            ('starts', start_count)):
+            sections[name] = (position, count)
+            position += count * 4
+        sections['words'] = (position, word_bytes)
+        return sections
+
+    def _ints(self, name):
+        position, count = self._sections()[name]
+        return csr_graph._int_view(self._mapped, position, count)
+
+    @property
+    def graph(self):
+        """
+        The csr_graph.CSRGraph, with its component index attached.
+        """
+        if self._graph is None:
+            self._graph = csr_graph.CSRGraph(
+                self._words(), self._ints('offsets'), self._ints('neighbors')
+            )
+            self._graph.components = self.components
+        return self._graph
+
+    @property
+    def components(self):
+        """
+        The components.ComponentIndex for the graph.
+        """
+        if self._components is None:
+            offsets = self._ints('offsets')
+            component_ids = self._ints('components')
+            sizes = self._ints('sizes')
+            self._components = components.ComponentIndex({
+                word: [
+                    component_ids[i],
+                    sizes[i],
+                    offsets[i + 1] - offsets[i]
+                ]
+                for i, word in enumerate(self._words())
+            }, self._counts[1])
+        return self._components
+
+    def _words(self):
+        if self._word_list is None:
+            position, word_bytes = self._sections()['words']
+            table = self._mapped[position:position + word_bytes]
+            self._word_list = \
+                table.decode('utf-8').split('\n') if self._counts[0] else []
+        return self._word_list
+
+    @property
+    def word_rankings(self):
+        """
+        {word: ranking} for every ranked word in the graph.
+        """
+        if self._word_rankings is None:
+            position, count = self._sections()['ranks']
+            ranks = memoryview(self._mapped)[position:position + count * 8]
+            if sys.byteorder == 'little':
+                ranks = ranks.cast('d')
+            else:
+                ranks = array('d', ranks.tobytes())
+                ranks.byteswap()
+            self._word_rankings = {
+                word: rank for word, rank in zip(self.graph.words, ranks)
+                if not math.isnan(rank)
+            }
+        return self._word_rankings
+
+    @property
+    def start_words(self):
+        """
+        The words from the compiled word list that are in the graph.
+        """
+        if self._start_words is None:
+            words = self.graph.words
+            self._start_words = [words[i] for i in self._ints('starts')]
+        return self._start_words
+
+
+def _legacy_startup(graph_path, words_path, word_rank_path):
+    # What ladder_builder.main does without a bundle.
+    g = csr_graph.CSRGraph()
+    g.load_graph(graph_path)
+    g.components = components.ComponentIndex.load_or_compute(g, graph_path)
+    with open(words_path, 'r') as words_file:
+        words = {x.strip() for x in words_file.readlines()}
+    with open(word_rank_path, 'r') as input_words:
+        word_rankings = json.load(input_words)
+    rank_average = rank_table.average_rank(word_rankings)
+    return g, words, word_rankings, rank_average
+
+
+def _bundle_startup(bundle_path):
+    startup = Bundle(bundle_path)
+    return (startup.graph, set(startup.start_words), startup.word_rankings,
+            startup.rank_average)
+
+
+def compare_startup(graph_path, words_path, word_rank_path, bundle_path,
+                    repeat=5):
+    """
+    Time loading everything the generator needs the old way and from a
+    bundle.
+
+    Returns:
+        (dict): The best time for each, in seconds.
+    """
+    def best(load, *args):
+        times = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            load(*args)
+            times.append(time.perf_counter() - begin)
+        return min(times)
+
+    return {
+        'legacy_seconds': best(
+            _legacy_startup, graph_path, words_path, word_rank_path
+        ),
+        'bundle_seconds': best(_bundle_startup, bundle_path),
+    }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.path.join(file_path, '..', 'data')
+    parser = argparse.ArgumentParser(
+        description=(
+            'Compile the graph, word list and rankings into one startup '
+            'bundle, check one, or compare startup times.'
+        )
+    )
+    parser.add_argument('command', choices=['compile', 'check', 'compare'])
+    parser.add_argument(
+        '--bundle',
+        default=os.path.join(data_path, 'graph_data', 'startup.bundle')
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(data_path, 'graph_data', 'graph.json')
+    )
+    parser.add_argument(
+        '--words',
+        default=os.path.join(
+            data_path, 'word_lists', 'even_more_five_letter_words.txt'
+        )
+    )
+    parser.add_argument(
+        '--word-rank',
+        default=os.path.join(data_path, 'word_rankings', 'word_rank.json')
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    sources = bundle_sources(args.graph, args.words, args.word_rank)
+    if args.command == 'compile':
+        compile_bundle(args.graph, args.words, args.word_rank, args.bundle)
+        print('Wrote {}'.format(args.bundle))
+    elif args.command == 'check':
+        startup = Bundle(args.bundle)
+        if not startup.is_current(sources):
+            print('{} is out of date; recompile it.'.format(args.bundle))
+            sys.exit(1)
+        print('{} is up to date.'.format(args.bundle))
+    else:
+        results = compare_startup(
+            args.graph, args.words, args.word_rank, args.bundle
+        )
+        print(', '.join(
+            '{}: {}'.format(key, value) for key, value in results.items()
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+
+
+class ComponentIndex():
+    """
+    The connected component of every word in the graph, along with the size
+    of that component and the word's degree. Words in different components
+    can never be joined by a ladder, and a start word whose component has
+    fewer than `steps` words can never start a ladder of `steps` words, so
+    both can be rejected before doing any searching.
+    """
+    def __init__(self, entries=None, edge_count=0):
+        # {word: [component id, component size, degree]}
+        self.entries = entries if entries is not None else {}
+        self.edge_count = edge_count
+
+    @classmethod
+    def compute(cls, g):
+        """
+        Label the connected components of a graph with a breadth-first search
+        from every unlabeled word.
+
+        Args:
+            g (graph.Graph or csr_graph.CSRGraph): The graph to index.
+
+        Returns:
+            (ComponentIndex): The computed index.
+        """
+        entries = {}
+        edge_count = 0
+        component = 0
+        for word in sorted(g.vertices()):
+            if word in entries:
+                continue
+            members = [word]
+            entries[word] = None
+            i = 0
+            while i < len(members):
+                for child in g.get_edges_for_vertex(members[i]):
+                    if child not in entries:
+                        entries[child] = None
+                        members.append(child)
+                i += 1
+            for member in members:
+                degree = len(g.get_edges_for_vertex(member))
+                edge_count += degree
+                entries[member] = [component, len(members), degree]
+            component += 1
+        return cls(entries, edge_count)
+
+    def __contains__(self, word):
+        return word in self.entries
+
+    def component(self, word):
+        return self.entries[word][0]
+
+    def component_size(self, word):
+        return self.entries[word][1]
+
+    def degree(self, word):
+        return self.entries[word][2]
+
+    def connected(self, w1, w2):
+        """
+        Check whether a ladder can exist between two words.
+        """
+        if w1 not in self.entries or w2 not in self.entries:
+            return False
+        return self.entries[w1][0] == self.entries[w2][0]
+
+    def can_hold_path(self, word, steps):
+        """
+        Check whether the word's component is big enough to hold a ladder of
+        `steps` words starting at it.
+        """
+        if word not in self.entries:
+            return False
+        _, size, degree = self.entries[word]
+        return size >= steps and (steps <= 1 or degree > 0)
+
+    def matches(self, g):
+        """
+        Check whether this index was computed for the given graph (same
+        words and number of edges).
+        """
+        if len(self.entries) != len(g.vertices()):
+            return False
+        if any(word not in self.entries for word in g.vertices()):
+            return False
+        edge_count = sum(
+            len(g.get_edges_for_vertex(word)) for word in g.vertices()
+        )
+        return edge_count == self.edge_count
+
+    def save(self, path):
+        with open(path, 'w') as output_file:
+            json.dump({
+                'edge_count': self.edge_count,
+                'words': self.entries
+            }, output_file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as input_file:
+            data = json.load(input_file)
+        return cls(data['words'], data['edge_count'])
+
+    @classmethod
+    def load_or_compute(cls, g, graph_path):
+        """
+        Load the index stored next to a graph file, recomputing (and saving)
+        it if it's missing or was built for a different graph.
+
+        Args:
+            g (graph.Graph or csr_graph.CSRGraph): The loaded graph.
+            graph_path (string): The path the graph was loaded from.
+
+        Returns:
+            (ComponentIndex): The index for `g`.
+        """
+        path = index_path(graph_path)
+        if os.path.exists(path):
+            index = cls.load(path)
+            if index.matches(g):
+                return index
+        index = cls.compute(g)
+        index.save(path)
+        return index
+
+
+def index_path(graph_path):
+    """
+    The path of the component index stored next to a graph file (e.g.
+    graph.json -> graph_components.json).
+    """
+    return '{}_components.json'.format(os.path.splitext(graph_path)[0])
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Build the component index stored next to a graph file.'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to index (JSON or binary)'
+    )
+    return parser
+
+
+def main():
+    import csr_graph
+
+    args = build_parser().parse_args()
+    g = csr_graph.CSRGraph()
+    g.load_graph(args.graph)
+    index = ComponentIndex.compute(g)
+    index.save(index_path(args.graph))
+
+    sizes = {}
+    for component, size, _ in index.entries.values():
+        sizes[component] = size
+    print('{} words in {} components (largest: {})'.format(
+        len(index.entries), len(sizes), max(sizes.values(), default=0)
+    ))
+
+
+if __name__ == '__main__':
+    main()
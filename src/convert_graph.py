@@ -0,0 +1,72 @@
+import argparse
+import json
+import time
+
+import csr_graph
+
+
+def convert(input_path, output_path):
+    """
+    Convert a graph between graph.json and the binary graph format. The
+    direction is picked from the input file: binary input is written out as
+    JSON, and JSON input is written out as binary.
+
+    Args:
+        input_path (string): The graph file to read.
+        output_path (string): The file to write the converted graph to.
+
+    Returns:
+        (string): The format that was written ('json' or 'binary').
+    """
+    g = csr_graph.CSRGraph()
+    g.load_graph(input_path)
+    if csr_graph.is_binary_graph(input_path):
+        with open(output_path, 'w') as output_file:
+            json.dump(g.to_edges(), output_file)
+        return 'json'
+
+    g.save_binary(output_path)
+    return 'binary'
+
+
+def time_load(path, repeat=5):
+    """
+    Time how long CSRGraph.load_graph takes for a graph file (best of
+    `repeat` runs).
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        g = csr_graph.CSRGraph()
+        g.load_graph(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Convert a graph between graph.json and the binary format.'
+    )
+    parser.add_argument('input', help='The graph file to convert')
+    parser.add_argument('output', help='Where to write the converted graph')
+    parser.add_argument(
+        '--time',
+        action='store_true',
+        help='Report how long each format takes to load'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    written = convert(args.input, args.output)
+    print('Wrote {} graph to {}'.format(written, args.output))
+
+    if args.time:
+        print('{}: {:.6f}s'.format(args.input, time_load(args.input)))
+        print('{}: {:.6f}s'.format(args.output, time_load(args.output)))
+
+
+if __name__ == '__main__':
+    main()
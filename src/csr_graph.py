@@ -0,0 +1,414 @@
+import argparse
+import gc
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+import tracemalloc
+from array import array
+
+import graph
+import graph_delta
+import solver
+
+
+# Binary graph file layout (all integers little-endian int32):
+#   header:    magic, format version, vertex count, neighbor count, word
+#              table size in bytes
+#   offsets:   vertex count + 1 ints
+#   neighbors: neighbor count ints
+#   words:     UTF-8 words joined by newlines, in vertex id order
+BINARY_MAGIC = b'WLGB'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sIIII')
+
+
+def is_binary_graph(path):
+    """
+    Check whether a file is in the binary graph format (as opposed to JSON).
+    """
+    with open(path, 'rb') as input_file:
+        return input_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _int_view(buffer, start, count):
+    """
+    View `count` little-endian int32s in `buffer` without copying them (when
+    the host is little-endian).
+    """
+    view = memoryview(buffer)[start:start + count * 4]
+    if sys.byteorder == 'little':
+        return view.cast('i')
+    values = array('i', view.tobytes())
+    values.byteswap()
+    return values
+
+
+def _int_bytes(values):
+    values = array('i', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+class CSRGraph():
+    """
+    A compact, read-only version of graph.Graph that stores the adjacency in
+    compressed sparse rows. Every word is interned once in a word table and
+    given an integer id; the neighbors of vertex `i` are
+    `neighbors[offsets[i]:offsets[i+1]]`. This avoids holding a Python list of
+    strings per vertex and lets traversals work on integers instead of hashing
+    strings.
+
+    The public methods mirror graph.Graph so existing callers can use either.
+    """
+    def __init__(self, words=None, offsets=None, neighbors=None):
+        self.words = words if words is not None else []
+        self.ids = {word: i for i, word in enumerate(self.words)}
+        self.offsets = offsets if offsets is not None else array('i', [0])
+        self.neighbors = neighbors if neighbors is not None else array('i')
+        # An optional components.ComponentIndex (see graph.Graph).
+        self.components = None
+        # Bumped whenever a different graph is loaded in place (see
+        # graph.Graph).
+        self.version = 0
+
+    @classmethod
+    def from_edges(cls, edges):
+        """
+        Build a CSRGraph from a {word: [word]} adjacency dict (the format of
+        graph.Graph.edges and graph.json).
+
+        Args:
+            edges {string: [string]}: The adjacency lists to convert.
+
+        Returns:
+            (CSRGraph): The converted graph.
+        """
+        words = list(edges.keys())
+        # Words that only show up as a neighbor still need an id.
+        seen = set(words)
+        for children in edges.values():
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    words.append(child)
+        ids = {word: i for i, word in enumerate(words)}
+
+        offsets = array('i', [0])
+        neighbors = array('i')
+        for word in words:
+            neighbors.extend(ids[child] for child in edges.get(word, []))
+            offsets.append(len(neighbors))
+
+        return cls(words, offsets, neighbors)
+
+    @classmethod
+    def from_graph(cls, g):
+        return cls.from_edges(g.edges)
+
+    def to_edges(self):
+        """
+        Expand the graph back into a {word: [word]} adjacency dict.
+        """
+        return {
+            word: self.get_edges_for_vertex(word) for word in self.words
+        }
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def vertices(self):
+        return list(self.words)
+
+    def vertex_id(self, word):
+        return self.ids[word]
+
+    def neighbor_ids(self, vertex_id):
+        return self.neighbors[
+            self.offsets[vertex_id]:self.offsets[vertex_id + 1]
+        ]
+
+    def degree(self, vertex_id):
+        return self.offsets[vertex_id + 1] - self.offsets[vertex_id]
+
+    def get_edges_for_vertex(self, v):
+        return [self.words[n] for n in self.neighbor_ids(self.ids[v])]
+
+    def has_children(self, vertex, visited=None):
+        vertex_id = self.ids[vertex]
+        if not visited:
+            return self.degree(vertex_id) > 0
+        # Children we've already visited count as empty (see
+        # graph.Graph.has_children).
+        for n in self.neighbor_ids(vertex_id):
+            if self.words[n] not in visited:
+                return True
+        return False
+
+    def get_random_destination_from_node(self, start, steps, stats=None):
+        """
+        The same randomized DFS as graph.Graph.get_random_destination_from_node
+        (including its optional stats) but run over integer ids.
+        """
+        if stats is not None:
+            stats.add('calls')
+        start_id = self.ids[start]
+        path = []
+        stack = [start_id]
+        visited = set()
+
+        repeated = 0
+
+        i = 0
+        while i < steps:
+            # Prevent an infinite loop where there is no solution (mirrors
+            # graph.Graph).
+            if stack[0] == start_id:
+                repeated += 1
+            if repeated == 2:
+                if stats is not None:
+                    stats.add('bailouts')
+                return []
+
+            vertex = stack.pop()
+            visited.add(vertex)
+
+            path.append(vertex)
+
+            children = [
+                n for n in self.neighbor_ids(vertex) if n not in visited
+            ]
+            if children:
+                random.shuffle(children)
+                stack += children
+                i += 1
+                if stats is not None:
+                    stats.add('expanded')
+                    stats.peak('peak_stack', len(stack))
+                    stats.peak('peak_depth', len(path))
+            else:
+                if stats is not None:
+                    stats.add('restarts')
+                stack.clear()
+                path.clear()
+                visited.clear()
+                i = 0
+
+                stack.append(start_id)
+
+        return [self.words[v] for v in path]
+
+    def shortest_ladder(self, start, end, all_ladders=False):
+        """
+        Find the shortest ladder between two words (see
+        graph.Graph.shortest_ladder).
+        """
+        if start not in self.ids or end not in self.ids:
+            return []
+        if self.components and not self.components.connected(start, end):
+            return []
+        ladders = [
+            [self.words[v] for v in ladder]
+            for ladder in solver.shortest_ladders(
+                self.neighbor_ids, self.ids[start], self.ids[end], all_ladders
+            )
+        ]
+        if all_ladders:
+            return ladders
+        return ladders[0] if ladders else []
+
+    def print_graph(self):
+        print(self.to_edges())
+
+    def save_graph(self, output_path):
+        with open('{}/graph.json'.format(output_path), 'w') as output_file:
+            json.dump(self.to_edges(), output_file)
+
+    def save_binary(self, path):
+        """
+        Save the graph in the binary graph format. Unlike graph.json this can
+        be memory-mapped by load_binary, so loading is close to instant and
+        every process that maps the file shares the same pages.
+
+        Args:
+            path (string): The file to write.
+        """
+        word_table = '\n'.join(self.words).encode('utf-8')
+        with open(path, 'wb') as output_file:
+            output_file.write(BINARY_HEADER.pack(
+                BINARY_MAGIC,
+                BINARY_VERSION,
+                len(self.words),
+                len(self.neighbors),
+                len(word_table)
+            ))
+            output_file.write(_int_bytes(self.offsets))
+            output_file.write(_int_bytes(self.neighbors))
+            output_file.write(word_table)
+
+    def load_binary(self, path):
+        """
+        Load a graph saved with save_binary by memory-mapping it. The offsets
+        and neighbors are read straight out of the mapping rather than copied.
+
+        Args:
+            path (string): The file to load.
+        """
+        with open(path, 'rb') as input_file:
+            mapped = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, vertex_count, neighbor_count, word_bytes = \
+            BINARY_HEADER.unpack_from(mapped, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError('{} is not a binary graph file.'.format(path))
+        if version != BINARY_VERSION:
+            raise ValueError(
+                'Unsupported binary graph version {} in {}.'.format(
+                    version, path
+                )
+            )
+
+        position = BINARY_HEADER.size
+        offsets = _int_view(mapped, position, vertex_count + 1)
+        position += (vertex_count + 1) * 4
+        neighbors = _int_view(mapped, position, neighbor_count)
+        position += neighbor_count * 4
+        word_table = mapped[position:position + word_bytes].decode('utf-8')
+
+        self.words = word_table.split('\n') if vertex_count else []
+        self.ids = {word: i for i, word in enumerate(self.words)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+        # Keep the mapping open for as long as the views into it are in use.
+        self._mapped = mapped
+        self.components = None
+        self.version += 1
+
+    def load_graph(self, path):
+        """
+        Load a graph from either graph.json or a binary graph file.
+        """
+        if is_binary_graph(path):
+            self.load_binary(path)
+        else:
+            with open(path, 'r') as input_file:
+                self._replace_with(CSRGraph.from_edges(json.load(input_file)))
+
+        # Edits made since the snapshot was saved need the mutable graph to
+        # replay, so rebuild through graph.Graph when there are any.
+        log = graph_delta.DeltaLog(graph_delta.delta_path(path))
+        if log.records():
+            editable = graph.Graph()
+            editable.edges = self.to_edges()
+            log.replay(editable)
+            self._replace_with(CSRGraph.from_graph(editable))
+
+    def _replace_with(self, other):
+        self.words = other.words
+        self.ids = other.ids
+        self.offsets = other.offsets
+        self.neighbors = other.neighbors
+        # A component index attached to the old graph doesn't describe this
+        # one.
+        self.components = None
+        self.version += 1
+
+
+def _measure_load(load):
+    """
+    Measure the memory retained by the object `load` returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+
+def _time_walks(g, starts, steps, seed):
+    random.seed(seed)
+    begin = time.perf_counter()
+    for start in starts:
+        g.get_random_destination_from_node(start, steps)
+    return time.perf_counter() - begin
+
+
+def benchmark(graph_path, walks=2000, steps=5, seed=0):
+    """
+    Compare the memory footprint and walk speed of graph.Graph against
+    CSRGraph for the same graph file.
+
+    Args:
+        graph_path (string): The graph.json to load.
+        walks (int=2000): The number of random walks to time.
+        steps (int=5): The number of steps for each walk.
+        seed (int=0): The seed for picking start words and walking.
+
+    Returns:
+        (dict): Memory (bytes) and timings (seconds) for both graphs.
+    """
+    def load_dict():
+        g = graph.Graph()
+        g.load_graph(graph_path)
+        return g
+
+    def load_csr():
+        g = CSRGraph()
+        g.load_graph(graph_path)
+        return g
+
+    dict_graph, dict_bytes, dict_peak, dict_load = _measure_load(load_dict)
+    csr_graph, csr_bytes, csr_peak, csr_load = _measure_load(load_csr)
+
+    rng = random.Random(seed)
+    candidates = [w for w in csr_graph.words if csr_graph.has_children(w)]
+    starts = [rng.choice(candidates) for _ in range(walks)]
+
+    return {
+        'dict_bytes': dict_bytes,
+        'csr_bytes': csr_bytes,
+        'dict_peak_bytes': dict_peak,
+        'csr_peak_bytes': csr_peak,
+        'dict_load_seconds': dict_load,
+        'csr_load_seconds': csr_load,
+        'dict_walk_seconds': _time_walks(dict_graph, starts, steps, seed),
+        'csr_walk_seconds': _time_walks(csr_graph, starts, steps, seed),
+    }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Compare graph.Graph against CSRGraph.'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph.json to load'
+    )
+    parser.add_argument('--walks', type=int, default=2000)
+    parser.add_argument('--steps', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    results = benchmark(args.graph, args.walks, args.steps, args.seed)
+    for key, value in results.items():
+        print('{}: {}'.format(key, value))
+
+
+if __name__ == '__main__':
+    main()
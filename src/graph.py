@@ -1,5 +1,9 @@
 import random
 import json
+from bisect import insort
+
+import graph_delta
+import solver
 
 
 class Graph():
@@ -10,14 +14,30 @@ class Graph():
     """
     def __init__(self):
         self.edges = {}
+        # An optional components.ComponentIndex used to answer queries
+        # between disconnected words without searching.
+        self.components = None
+        # {wildcard pattern: set of words}, built on the first add_word or
+        # remove_word so edits only touch the affected words.
+        self.patterns = None
+        # Where add_word/remove_word record edits (set by load_graph).
+        self.delta_log = None
+        # Bumped on every edit so caches built from the graph can tell
+        # they're stale.
+        self.version = 0
 
     def add_vertex(self, v):
-        self.edges[v] = []
+        # Don't clobber the edges of a vertex that already exists.
+        if v not in self.edges:
+            self.edges[v] = []
 
     def add_vertices(self, vs):
         for v in vs:
             self.add_vertex(v)
 
+    def vertices(self):
+        return list(self.edges.keys())
+
     def get_edges_for_vertex(self, v):
         return self.edges[v]
 
@@ -34,6 +54,78 @@ class Graph():
             else:
                 self.edges[v2] = [v1]
 
+    def _build_patterns(self):
+        self.patterns = {}
+        for word in self.edges:
+            for pattern in wildcard_patterns(word):
+                if pattern in self.patterns:
+                    self.patterns[pattern].add(word)
+                else:
+                    self.patterns[pattern] = {word}
+
+    def add_word(self, word, log=True):
+        """
+        Add a dictionary word and connect it to every word one letter away.
+        Only the words sharing one of its wildcard patterns are touched, and
+        adjacency lists are kept sorted so the graph matches a full rebuild.
+
+        Args:
+            word (string): The word to add.
+            log (bool=True): Record the edit in the delta log (if any).
+
+        Returns:
+            (bool): False if the word was already in the graph.
+        """
+        if word in self.edges:
+            return False
+        if self.patterns is None:
+            self._build_patterns()
+
+        self.edges[word] = []
+        for pattern in wildcard_patterns(word):
+            bucket = self.patterns.setdefault(pattern, set())
+            for other in bucket:
+                insort(self.edges[word], other)
+                insort(self.edges[other], word)
+            bucket.add(word)
+
+        self.version += 1
+        # The component index no longer matches (an added word can join two
+        # components, a removed one split them).
+        self.components = None
+        if log and self.delta_log is not None:
+            self.delta_log.append('add', word)
+        return True
+
+    def remove_word(self, word, log=True):
+        """
+        Remove a dictionary word and every edge touching it.
+
+        Args:
+            word (string): The word to remove.
+            log (bool=True): Record the edit in the delta log (if any).
+
+        Returns:
+            (bool): False if the word wasn't in the graph.
+        """
+        if word not in self.edges:
+            return False
+        if self.patterns is None:
+            self._build_patterns()
+
+        for other in self.edges.pop(word):
+            self.edges[other].remove(word)
+        for pattern in wildcard_patterns(word):
+            self.patterns[pattern].discard(word)
+
+        self.version += 1
+        # The component index no longer matches (an added word can join two
+        # components, a removed one split them).
+        self.components = None
+        if log and self.delta_log is not None:
+            self.delta_log.append('remove', word)
+        return True
+
     def has_children(self, vertex, visited=None):
         if not visited:
             return len(self.edges[vertex]) > 0
@@ -46,7 +138,23 @@ class Graph():
             unvisited_children = children.difference(visited)
             return len(unvisited_children) > 0
 
-    def get_random_destination_from_node(self, start, steps):
+    def get_random_destination_from_node(self, start, steps, stats=None):
+        """
+        Randomly walk `steps` words from `start`, starting over whenever the
+        walk runs into a dead end.
+
+        Args:
+            start (string): The start word.
+            steps (int): The number of words in the walk.
+            stats (walker_stats.WalkerStats=None): If given, records calls,
+                restarts, bailouts, vertices expanded, peak stack size and
+                peak path length ('peak_depth').
+
+        Returns:
+            [string]: The walk, or an empty list if it gave up.
+        """
+        if stats is not None:
+            stats.add('calls')
         path = []
         stack = []
         stack.append(start)
@@ -61,6 +169,8 @@ class Graph():
             if stack[0] == start:
                 repeated += 1
             if repeated == 2:
+                if stats is not None:
+                    stats.add('bailouts')
                 return []
 
             vertex = stack.pop()
@@ -75,11 +185,17 @@ class Graph():
 
                 stack += children
                 i += 1
+                if stats is not None:
+                    stats.add('expanded')
+                    stats.peak('peak_stack', len(stack))
+                    stats.peak('peak_depth', len(path))
             # We do the same thing if the node has no children or if we've
             # already visited this node and no it has no children (might be
             # redundant?): start over.
             else:
                 visited_childless_vertices.add(vertex)
+                if stats is not None:
+                    stats.add('restarts')
                 stack.clear()
                 path.clear()
                 visited.clear()
@@ -89,6 +205,33 @@ class Graph():
 
         return path
 
+    def shortest_ladder(self, start, end, all_ladders=False):
+        """
+        Find the shortest ladder between two words.
+
+        Args:
+            start (string): The start word.
+            end (string): The end word.
+            all_ladders (bool=False): Return every shortest ladder instead of
+                just one.
+
+        Returns:
+            [string] or [[string]]: The shortest ladder (or, with
+                `all_ladders`, a list of every shortest ladder). Empty if
+                either word isn't in the graph or there is no ladder between
+                them.
+        """
+        if start not in self.edges or end not in self.edges:
+            return []
+        if self.components and not self.components.connected(start, end):
+            return []
+        ladders = solver.shortest_ladders(
+            self.get_edges_for_vertex, start, end, all_ladders
+        )
+        if all_ladders:
+            return ladders
+        return ladders[0] if ladders else []
+
     def print_graph(self):
         print(self.edges)
 
@@ -99,6 +242,13 @@ class Graph():
     def load_graph(self, path):
         with open(path, 'r') as input_file:
             self.edges = json.load(input_file)
+        self.patterns = None
+        self.components = None
+        self.version += 1
+        # Bring the snapshot up to date with any edits made since it was
+        # saved.
+        self.delta_log = graph_delta.DeltaLog(graph_delta.delta_path(path))
+        self.delta_log.replay(self)
 
 
 def word_diff(w1, w2):
@@ -135,6 +285,24 @@ def word_diff(w1, w2):
     return discrepancy + length_discrepancy
 
 
+def wildcard_patterns(word, wildcard='_'):
+    """
+    Generate every one-letter wildcard pattern for a word. Two words of the
+    same length are adjacent in the graph exactly when they share one of these
+    patterns (e.g., "water" and "later" both match "_ater").
+
+    Args:
+        word (string): The word to generate patterns for.
+        wildcard (string='_'): The character used to mask a letter.
+
+    Returns:
+        [string]: One pattern per character position in the word.
+    """
+    return [
+        word[:i] + wildcard + word[i+1:] for i in range(len(word))
+    ]
+
+
 def is_valid_sequence(seq):
     valid = True
     for i in range(len(seq)-1):
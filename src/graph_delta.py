@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+
+
+def delta_path(graph_path):
+    """
+    The path of the delta log kept next to a graph file (e.g. graph.json ->
+    graph.json.delta).
+    """
+    return '{}.delta'.format(graph_path)
+
+
+class DeltaLog():
+    """
+    An append-only log of dictionary edits made to a graph since its last
+    snapshot. Each line is a JSON record like {"op": "add", "word": "water"}.
+    Loading a graph replays the log on top of the snapshot, so adding or
+    removing a word only costs one appended line instead of rewriting the
+    whole graph file.
+    """
+    OPERATIONS = ('add', 'remove')
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, op, word):
+        if op not in self.OPERATIONS:
+            raise ValueError('Unknown delta operation: {}'.format(op))
+        self._drop_partial_line()
+        with open(self.path, 'a') as log_file:
+            log_file.write(json.dumps({'op': op, 'word': word}) + '\n')
+
+    def _drop_partial_line(self):
+        """
+        Cut off a partial last line left by a crash mid-append, so the next
+        record starts on a line of its own instead of being glued onto it.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as log_file:
+            end = log_file.seek(0, os.SEEK_END)
+            if not end:
+                return
+            log_file.seek(end - 1)
+            if log_file.read(1) == b'\n':
+                return
+            # Search backwards for the end of the last complete record.
+            while end > 0:
+                start = max(0, end - 4096)
+                log_file.seek(start)
+                newline = log_file.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    log_file.truncate(start + newline + 1)
+                    return
+                end = start
+            log_file.truncate(0)
+
+    def records(self):
+        """
+        Read the (op, word) records in the log, oldest first.
+
+        A partial last line (left by a crash mid-append) is ignored. A bad
+        record anywhere else means the log is corrupt and raises ValueError
+        rather than silently dropping the edits after it.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r') as log_file:
+            lines = log_file.readlines()
+        records = []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                op, word = record['op'], record['word']
+            except (ValueError, KeyError, TypeError):
+                if number == len(lines) and not line.endswith('\n'):
+                    break
+                raise ValueError(
+                    'Bad delta record on line {} of {}'.format(
+                        number, self.path
+                    )
+                )
+            if op not in self.OPERATIONS:
+                raise ValueError(
+                    'Unknown delta operation {} on line {} of {}'.format(
+                        op, number, self.path
+                    )
+                )
+            records.append((op, word))
+        return records
+
+    def replay(self, g):
+        """
+        Apply every record in the log to a graph.Graph without logging them
+        again.
+
+        Returns:
+            (int): The number of records applied.
+        """
+        records = self.records()
+        for op, word in records:
+            if op == 'add':
+                g.add_word(word, log=False)
+            else:
+                g.remove_word(word, log=False)
+        return len(records)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_editable_graph(graph_path):
+    """
+    Load a graph file (JSON or binary) into a graph.Graph with its delta log
+    replayed and attached, so add_word/remove_word are logged.
+    """
+    import csr_graph
+    import graph
+
+    if not csr_graph.is_binary_graph(graph_path):
+        g = graph.Graph()
+        g.load_graph(graph_path)
+        return g
+
+    compact_graph = csr_graph.CSRGraph()
+    compact_graph.load_binary(graph_path)
+    g = graph.Graph()
+    g.edges = compact_graph.to_edges()
+    g.delta_log = DeltaLog(delta_path(graph_path))
+    g.delta_log.replay(g)
+    return g
+
+
+def compact(graph_path):
+    """
+    Fold the delta log for a graph file into a new snapshot and clear the
+    log. The snapshot is written to a temporary file and moved into place so
+    a crash never leaves a half-written graph.
+
+    Args:
+        graph_path (string): The graph file (JSON or binary) to compact.
+
+    Returns:
+        (int): The number of delta records folded in.
+    """
+    import csr_graph
+
+    log = DeltaLog(delta_path(graph_path))
+    count = len(log.records())
+    if not count:
+        return 0
+
+    g = load_editable_graph(graph_path)
+
+    temp_path = '{}.tmp'.format(graph_path)
+    if csr_graph.is_binary_graph(graph_path):
+        csr_graph.CSRGraph.from_graph(g).save_binary(temp_path)
+    else:
+        with open(temp_path, 'w') as output_file:
+            json.dump(g.edges, output_file)
+    os.replace(temp_path, graph_path)
+    log.clear()
+    return count
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Add or remove dictionary words, or compact the graph.'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to edit (JSON or binary)'
+    )
+    parser.add_argument('command', choices=['add', 'remove', 'compact'])
+    parser.add_argument('words', nargs='*', help='The words to add or remove')
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.command == 'compact':
+        count = compact(args.graph)
+        print('Folded {} edits into {}'.format(count, args.graph))
+        return
+
+    g = load_editable_graph(args.graph)
+    for word in args.words:
+        if args.command == 'add':
+            changed = g.add_word(word)
+        else:
+            changed = g.remove_word(word)
+        if not changed:
+            print('Skipped {} (no change)'.format(word))
+
+
+if __name__ == '__main__':
+    main()
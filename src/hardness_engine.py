@@ -0,0 +1,274 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+import csr_graph
+import path_counts
+import rank_table
+
+
+# How many distinct words share one batched BFS. Each batch holds a few
+# (vertex count, BATCH_SIZE) matrices.
+BATCH_SIZE = 256
+
+HARDNESS_FIELDS = ['hardness', 'branching', 'route_rank']
+
+
+class HardnessEngine():
+    """
+    Scores ladders by how hard their start/end pair really is:
+
+    - hardness: the true graph distance (the number of steps in the shortest
+      ladder), rather than the Hamming distance between the two words.
+    - branching: the average number of choices (the degree) at each word the
+      player moves from along an optimal route.
+    - route_rank: the average word ranking along that route, with the same
+      penalty for unranked words as ladder_builder.calculate_rank.
+
+    Pairs are scored in batches. One multi-source BFS (a boolean adjacency
+    product per layer, see path_counts.Adjacency) runs for up to BATCH_SIZE
+    distinct end words at once, and every ladder ending in one of them reads
+    its distance from the same matrix. The optimal route is then walked for
+    all of the batch's ladders together, always stepping to the first
+    neighbor that is one step closer to the end.
+    """
+    def __init__(self, g, word_rankings, rank_average, adjacency=None,
+                 ranks=None):
+        """
+        Args:
+            g (csr_graph.CSRGraph): The word graph.
+            word_rankings {string: double}: A dict of {word: ranking}.
+            rank_average (double): The average ranking (see
+                ladder_builder.main).
+            adjacency (path_counts.Adjacency=None): The graph's adjacency
+                matrix, if it's already been built.
+            ranks (np.ndarray=None): The vertex rankings (see
+                rank_table.rank_array), if they've already been worked out.
+        """
+        self.graph = g
+        self.adjacency = adjacency or path_counts.Adjacency(g)
+        self.ranks = ranks if ranks is not None else \
+            rank_table.rank_array(g, word_rankings, rank_average)
+        offsets = self.adjacency.offsets
+        self.degrees = np.diff(offsets)
+        # Every vertex's neighbors, padded with -1 to the highest degree.
+        width = int(self.degrees.max()) if len(self.degrees) else 0
+        self.padded = np.full((self.adjacency.size, width), -1, dtype=np.int64)
+        rows = np.repeat(np.arange(self.adjacency.size), self.degrees)
+        columns = np.arange(len(self.adjacency.neighbors)) - offsets[rows]
+        self.padded[rows, columns] = self.adjacency.neighbors
+
+    def distances(self, target_ids):
+        """
+        Multi-source BFS: the distance from every vertex to each target.
+
+        Args:
+            target_ids [int]: The vertex ids to measure to.
+
+        Returns:
+            (np.ndarray): A (vertex count, len(target_ids)) int32 matrix, -1
+                where a vertex can't reach the target.
+        """
+        columns = np.arange(len(target_ids))
+        distances = np.full(
+            (self.adjacency.size, len(target_ids)), -1, dtype=np.int32
+        )
+        distances[target_ids, columns] = 0
+        frontier = np.zeros(distances.shape, dtype=bool)
+        frontier[target_ids, columns] = True
+        depth = 0
+        while True:
+            depth += 1
+            frontier = self.adjacency.multiply(frontier) & (distances < 0)
+            if not frontier.any():
+                break
+            distances[frontier] = depth
+        return distances
+
+    def score_ids(self, start_ids, end_ids, batch_size=BATCH_SIZE):
+        """
+        Score (start, end) pairs given as vertex ids.
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): hardness (-1 if the words
+                aren't connected), branching and route_rank (NaN if they
+                aren't connected or are the same word) for each pair.
+        """
+        start_ids = np.asarray(start_ids, dtype=np.int64)
+        end_ids = np.asarray(end_ids, dtype=np.int64)
+        hardness = np.full(len(start_ids), -1, dtype=np.int64)
+        branching = np.full(len(start_ids), np.nan)
+        route_rank = np.full(len(start_ids), np.nan)
+
+        targets, target_index = np.unique(end_ids, return_inverse=True)
+        for batch in range(0, len(targets), batch_size):
+            distances = self.distances(targets[batch:batch + batch_size])
+            pairs = np.nonzero(
+                (target_index >= batch) & (target_index < batch + batch_size)
+            )[0]
+            columns = target_index[pairs] - batch
+            current = start_ids[pairs]
+            remaining = distances[current, columns].astype(np.int64)
+            hardness[pairs] = remaining
+
+            connected = remaining >= 0
+            pairs, columns = pairs[connected], columns[connected]
+            current, remaining = current[connected], remaining[connected]
+            degree_total = np.zeros(len(pairs))
+            rank_total = self.ranks[current].copy()
+            # Walk every route one step at a time, in lockstep.
+            while True:
+                moving = remaining > 0
+                if not moving.any():
+                    break
+                degree_total[moving] += self.degrees[current[moving]]
+                options = self.padded[current[moving]]
+                option_distances = np.where(
+                    options >= 0,
+                    distances[options, columns[moving, None]],
+                    -1
+                )
+                closer = option_distances == remaining[moving, None] - 1
+                current[moving] = options[
+                    np.arange(len(options)), closer.argmax(axis=1)
+                ]
+                remaining[moving] -= 1
+                rank_total[moving] += self.ranks[current[moving]]
+
+            steps = hardness[pairs]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                branching[pairs] = np.where(
+                    steps > 0, degree_total / steps, np.nan
+                )
+            route_rank[pairs] = rank_total / (steps + 1)
+            route_rank[pairs[steps == 0]] = np.nan
+        return hardness, branching, route_rank
+
+    def score(self, pairs, batch_size=BATCH_SIZE):
+        """
+        Score (start, end) word pairs.
+
+        Args:
+            pairs [(string, string)]: The start/end pairs to score.
+            batch_size (int=BATCH_SIZE): Distinct end words per BFS batch.
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): See score_ids. Pairs with a
+                word missing from the graph score as unconnected.
+        """
+        ids = self.graph.ids
+        known = np.array(
+            [start in ids and end in ids for start, end in pairs], dtype=bool
+        )
+        known_pairs = [pair for pair, k in zip(pairs, known) if k]
+        hardness = np.full(len(pairs), -1, dtype=np.int64)
+        branching = np.full(len(pairs), np.nan)
+        route_rank = np.full(len(pairs), np.nan)
+        if known_pairs:
+            scores = self.score_ids(
+                [ids[start] for start, _ in known_pairs],
+                [ids[end] for _, end in known_pairs],
+                batch_size
+            )
+            hardness[known], branching[known], route_rank[known] = scores
+        return hardness, branching, route_rank
+
+    def score_rows(self, ladders):
+        """
+        Score ladders (lists of words) into dicts keyed by HARDNESS_FIELDS,
+        ready to merge into output CSV rows.
+        """
+        hardness, branching, route_rank = self.score(
+            [(ladder[0], ladder[-1]) for ladder in ladders]
+        )
+        return [
+            {
+                'hardness': int(h),
+                'branching': float(b),
+                'route_rank': float(r),
+            }
+            for h, b, r in zip(hardness, branching, route_rank)
+        ]
+
+
+def benchmark(g, word_rankings, rank_average, count=100000, seed=0):
+    """
+    Time scoring `count` random start/end pairs.
+    """
+    rng = random.Random(seed)
+    words = g.words
+    pairs = [(rng.choice(words), rng.choice(words)) for _ in range(count)]
+
+    begin = time.perf_counter()
+    engine = HardnessEngine(g, word_rankings, rank_average)
+    hardness, _, _ = engine.score(pairs)
+    elapsed = time.perf_counter() - begin
+    return {
+        'pairs': count,
+        'connected': int(np.count_nonzero(hardness >= 0)),
+        'seconds': elapsed,
+    }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Score generated ladders by graph distance, branching '
+                    'and route rank.'
+    )
+    parser.add_argument(
+        'csv_path', nargs='?', help='A generated ladders CSV to score'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to load (JSON or binary)'
+    )
+    parser.add_argument(
+        '--word-rank',
+        default=os.path.join(
+            file_path, '..', 'data', 'word_rankings', 'word_rank.json'
+        )
+    )
+    parser.add_argument(
+        '--benchmark',
+        type=int,
+        default=0,
+        help='Score this many random pairs and report the time'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    g = csr_graph.CSRGraph()
+    g.load_graph(args.graph)
+    with open(args.word_rank, 'r') as input_words:
+        word_rankings = json.load(input_words)
+    rank_average = rank_table.average_rank(word_rankings)
+
+    if args.benchmark:
+        results = benchmark(g, word_rankings, rank_average, args.benchmark)
+        print(', '.join(
+            '{}: {}'.format(key, value) for key, value in results.items()
+        ))
+        return
+
+    with open(args.csv_path, 'r') as input_file:
+        ladders = [
+            row['sequence'].split(' ') for row in csv.DictReader(input_file)
+        ]
+    engine = HardnessEngine(g, word_rankings, rank_average)
+    for ladder, scores in zip(ladders, engine.score_rows(ladders)):
+        print('{} {hardness} {branching:.2f} {route_rank:.4f}'.format(
+            ' '.join(ladder), **scores
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import random
+
+
+def bfs_layers(g, start_id, max_depth):
+    """
+    Run a breadth-first search from a vertex, stopping after `max_depth`
+    layers.
+
+    Args:
+        g (csr_graph.CSRGraph): The graph to search.
+        start_id (int): The vertex id to search from.
+        max_depth (int): The deepest layer to expand to.
+
+    Returns:
+        ([[int]], {int: [int]}, {int: int}): The vertex ids in each layer
+            (layer `d` holds the vertices exactly `d` steps away), the
+            shortest-path parents of each vertex, and the number of shortest
+            paths from the start to each vertex.
+    """
+    layers = [[start_id]]
+    depths = {start_id: 0}
+    parents = {start_id: []}
+    path_counts = {start_id: 1}
+    while len(layers) <= max_depth:
+        depth = len(layers)
+        next_layer = []
+        for vertex in layers[-1]:
+            for child in g.neighbor_ids(vertex):
+                child_depth = depths.get(child)
+                if child_depth is None:
+                    depths[child] = depth
+                    parents[child] = [vertex]
+                    path_counts[child] = path_counts[vertex]
+                    next_layer.append(child)
+                elif child_depth == depth:
+                    parents[child].append(vertex)
+                    path_counts[child] += path_counts[vertex]
+        if not next_layer:
+            break
+        layers.append(next_layer)
+    return layers, parents, path_counts
+
+
+def sample_ladder_at_distance(g, start, distance, rng=None):
+    """
+    Pick a random end word whose shortest ladder from `start` is exactly
+    `distance` steps long, and return one of those shortest ladders. Every
+    shortest ladder to the chosen end word is equally likely.
+
+    Args:
+        g (csr_graph.CSRGraph): The graph to search.
+        start (string): The start word.
+        distance (int): The required graph distance between the start and end
+            words (the ladder will have `distance + 1` words).
+        rng (random.Random=None): The random source to use. Defaults to the
+            `random` module.
+
+    Returns:
+        [string]: The ladder, or an empty list if no word is exactly
+            `distance` steps from `start`.
+    """
+    rng = rng or random
+    layers, parents, path_counts = bfs_layers(
+        g, g.vertex_id(start), distance
+    )
+    if len(layers) <= distance:
+        return []
+
+    vertex = rng.choice(layers[distance])
+    path = [vertex]
+    while parents[vertex]:
+        # Weight each parent by how many shortest paths run through it so the
+        # ladder is uniform over all shortest ladders to this end word.
+        options = parents[vertex]
+        vertex = rng.choices(
+            options, weights=[path_counts[p] for p in options]
+        )[0]
+        path.append(vertex)
+    path.reverse()
+    return [g.words[v] for v in path]
@@ -1,9 +1,25 @@
+import argparse
 import random
 import json
 import csv
+import heapq
 import os
-
-import graph
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import batch_validation
+import bundle
+import components
+import csr_graph
+import hardness_engine
+import hardness_sampler
+import ladder_walker
+import pair_index
+import path_counts
+import rank_table
+import walker_stats
 
 
 class SequenceRank:
@@ -95,76 +111,668 @@ def distance(w1, w2):
     return discrepancy + length_discrepancy
 
 
-def save_sequences(sequences):
+OUTPUT_FIELDS = [
+    'start', 'end', 'sequence', 'rank', 'hardness', 'branching', 'route_rank',
+    'solution_count'
+]
+
+
+def sequence_row(sequence, hardness=None, solution_count=None, scores=None):
+    """
+    Build the output CSV row for a ranked sequence.
+
+    Args:
+        sequence (SequenceRank): The sequence to convert.
+        hardness (int=None): The precomputed hardness of the sequence.
+            Computed with distance if None.
+        solution_count (int=None): The number of walks of the ladder's
+            length from start to end, which may revisit words (see
+            path_counts.count_solutions). Left blank if None.
+        scores (dict=None): The hardness_engine scores for the ladder (one of
+            the dicts from HardnessEngine.score_rows). These replace
+            `hardness` and fill in branching and route_rank, which are
+            otherwise left blank.
+
+    Returns:
+        (dict): The row, keyed by OUTPUT_FIELDS.
+    """
+    start = sequence.sequence[0]
+    end = sequence.sequence[-1]
+    if hardness is None:
+        hardness = distance(start, end)
+    row = {
+        'start': start,
+        'end': end,
+        'sequence': ' '.join(sequence.sequence),
+        'rank': sequence.rank,
+        'hardness': hardness,
+        'branching': None,
+        'route_rank': None,
+        'solution_count': solution_count
+    }
+    if scores is not None:
+        row.update(scores)
+    return row
+
+
+def save_sequences(sequences, save_path=None, engine=None):
     """
     Save the sequences to an output CSV file.
 
     Args:
         sequences (list): The sequences to save.
+        save_path (string=None): The file to write. Defaults to
+            data/output/generated_ladders_2.csv.
+        engine (hardness_engine.HardnessEngine=None): If given, hardness is
+            the true graph distance between the start and end words (rather
+            than their letter-by-letter distance), and the branching,
+            route_rank and solution_count columns are filled in.
 
     Returns:
         none
     """
-    file_path = os.path.dirname(os.path.abspath(__file__))
-    save_path = os.path.join(
-        file_path, '..', 'data', 'output', 'generated_ladders_2.csv'
-    )
+    if save_path is None:
+        file_path = os.path.dirname(os.path.abspath(__file__))
+        save_path = os.path.join(
+            file_path, '..', 'data', 'output', 'generated_ladders_2.csv'
+        )
     # with open('/Users/nickrogers/Developer/word_ladder/data/output/generated_ladders_2.csv', 'w') as write_file:
+    # Work out the hardness of every sequence in one batch.
+    ladders = [s.sequence for s in sequences]
+    if engine is not None:
+        scores = engine.score_rows(ladders)
+        hardness = [row['hardness'] for row in scores]
+        solution_counts = [int(c) for c in path_counts.ladder_solution_counts(
+            engine.graph, ladders, adjacency=engine.adjacency
+        )]
+    else:
+        hardness = batch_validation.batch_distance(
+            [ladder[0] for ladder in ladders],
+            [ladder[-1] for ladder in ladders]
+        )
+        scores = [None] * len(sequences)
+        solution_counts = [None] * len(sequences)
     with open(save_path, 'w') as write_file:
-        writer = csv.DictWriter(write_file, fieldnames=[
-            'start', 'end', 'sequence', 'rank', 'hardness'
-        ])
+        writer = csv.DictWriter(write_file, fieldnames=OUTPUT_FIELDS)
 
         writer.writeheader()
-        for sequence in sequences:
-            start = sequence.sequence[0]
-            end = sequence.sequence[-1]
-            hardness = distance(start, end)
-            word_string = ' '.join(sequence.sequence)
-            writer.writerow({
-                'start': start,
-                'end': end,
-                'sequence': word_string,
-                'rank': sequence.rank,
-                'hardness': hardness
-            })
+        for sequence, h, count, score in zip(
+                sequences, hardness, solution_counts, scores):
+            writer.writerow(sequence_row(sequence, int(h), count, score))
 
 
-def main():
+class SequenceStream:
     """
-    Builds a sequence of ladders for use in our website. This involves running
-    the ladder building operation many times over while randomizing the words
-    each time and not reapeating any start/end sequences.
+    A streaming replacement for collecting every SequenceRank, sorting them
+    and then saving. Ladders are filtered as they arrive, only the best
+    `top_k` are kept (in a bounded heap), and every accepted ladder can also
+    be appended to CSV files in chunks as the run goes. Memory stays constant
+    no matter how many ladders are generated and a crashed run still leaves
+    its partial output on disk.
+    """
+    def __init__(self, top_k=None, stream_dir=None, shards=1,
+                 chunk_size=1000, engine=None, shard_bounds=None):
+        """
+        Args:
+            top_k (int=None): The number of best-ranked ladders to keep for
+                save_sequences. Keeps every ladder if None.
+            stream_dir (string=None): If given, every accepted ladder is also
+                written to CSV files in this directory as it arrives.
+            shards (int=1): Split the streamed ladders into this many files
+                by rank.
+            chunk_size (int=1000): How many rows to buffer per file before
+                writing them out.
+            engine (hardness_engine.HardnessEngine=None): If given, the
+                hardness_engine scores and solution_count are filled in (a
+                chunk at a time; see save_sequences).
+            shard_bounds ([double]=None): The shards - 1 ranks the shards
+                are split at. Ladder ranks are averages of word ranks and
+                bunch up in a narrow range, so if None the bounds are the
+                rank quantiles of the first `chunk_size` accepted ladders
+                (which are held back until then).
+        """
+        self.top_k = top_k
+        self.stream_dir = stream_dir
+        self.shards = max(1, shards)
+        self.chunk_size = chunk_size
+        self.engine = engine
+        if shard_bounds is not None and len(shard_bounds) != self.shards - 1:
+            raise ValueError(
+                'Expected {} shard bounds, got {}.'.format(
+                    self.shards - 1, len(shard_bounds)
+                )
+            )
+        if self.shards == 1:
+            self.shard_bounds = []
+        elif shard_bounds is not None:
+            self.shard_bounds = sorted(shard_bounds)
+        else:
+            self.shard_bounds = None
+        # (rank, row) for streamed ladders waiting for the shard bounds.
+        self._unsharded = []
+        self.accepted = 0
+        self.rejected = 0
+        # Min-heap of (rank, -arrival, sequence) so the worst-ranked (and, on
+        # ties, latest) ladder is the one dropped.
+        self._heap = []
+        self._buffers = [[] for _ in range(self.shards)]
+        if stream_dir is not None:
+            os.makedirs(stream_dir, exist_ok=True)
+            for shard in range(self.shards):
+                with open(self._shard_path(shard), 'w') as write_file:
+                    csv.DictWriter(
+                        write_file, fieldnames=OUTPUT_FIELDS
+                    ).writeheader()
+
+    def _shard_path(self, shard):
+        if self.shards == 1:
+            return os.path.join(self.stream_dir, 'ladders.csv')
+        return os.path.join(
+            self.stream_dir, 'ladders_rank_{:02d}.csv'.format(shard)
+        )
+
+    def _set_bounds(self):
+        # Split at the rank quantiles of the ladders seen so far.
+        ranks = sorted(rank for rank, _ in self._unsharded)
+        self.shard_bounds = [
+            ranks[len(ranks) * k // self.shards] if ranks else 0.0
+            for k in range(1, self.shards)
+        ]
+        for rank, row in self._unsharded:
+            self._route(rank, row)
+        self._unsharded = []
+
+    def _route(self, rank, row):
+        shard = bisect_right(self.shard_bounds, rank)
+        self._buffers[shard].append(row)
+        if len(self._buffers[shard]) >= self.chunk_size:
+            self._flush(shard)
+
+    def _flush(self, shard):
+        rows = self._buffers[shard]
+        if not rows:
+            return
+        if self.engine is not None:
+            ladders = [row['sequence'].split(' ') for row in rows]
+            counts = path_counts.ladder_solution_counts(
+                self.engine.graph, ladders, adjacency=self.engine.adjacency
+            )
+            for row, scores, count in zip(
+                    rows, self.engine.score_rows(ladders), counts):
+                row.update(scores)
+                row['solution_count'] = int(count)
+        with open(self._shard_path(shard), 'a') as write_file:
+            csv.DictWriter(write_file, fieldnames=OUTPUT_FIELDS).writerows(rows)
+        rows.clear()
+
+    def add(self, sequence):
+        """
+        Offer a ranked sequence to the stream.
+
+        Args:
+            sequence (SequenceRank): The ladder to add.
+
+        Returns:
+            (bool): Whether the ladder passed the hardness filter.
+        """
+        row = sequence_row(sequence)
+        # Start and end words that are only one letter apart are too easy.
+        # (For words in the graph, one letter apart is the same as one step
+        # apart, so this cheap check agrees with the graph distance.)
+        if row['hardness'] <= 1:
+            self.rejected += 1
+            return False
+
+        entry = (sequence.rank, -self.accepted, sequence)
+        self.accepted += 1
+        if self.top_k is None or len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+        if self.stream_dir is not None:
+            if self.shard_bounds is not None:
+                self._route(sequence.rank, row)
+            else:
+                self._unsharded.append((sequence.rank, row))
+                if len(self._unsharded) >= self.chunk_size:
+                    self._set_bounds()
+        return True
+
+    def best(self):
+        """
+        The kept ladders, best-ranked first (ties in arrival order).
+        """
+        entries = sorted(self._heap, key=lambda e: e[:2], reverse=True)
+        return [entry[2] for entry in entries]
+
+    def close(self, save_path=None):
+        """
+        Flush any buffered rows and save the best ladders with
+        save_sequences.
+        """
+        if self.stream_dir is not None:
+            if self.shard_bounds is None:
+                self._set_bounds()
+            for shard in range(self.shards):
+                self._flush(shard)
+        save_sequences(self.best(), save_path, self.engine)
+
+
+# How many generated ladders are ranked together (see rank_table).
+RANK_BATCH = 256
+
+
+def generate_sequences(g, walker, start_words, count, steps, hardness,
+                       word_rankings, rank_average, rng, published=None,
+                       stats=None, ranks=None):
+    """
+    Generate and rank ladders from a list of start words, using each start
+    word at most once.
+
+    Args:
+        g (csr_graph.CSRGraph): The word graph.
+        walker (ladder_walker.LadderWalker): The walker for `g`.
+        start_words [string]: The start words to try, in order.
+        count (int): Stop after this many ladders.
+        steps (int): The number of words in each random-walk ladder.
+        hardness (int): If not None, generate shortest ladders of exactly
+            this many steps instead of random walks.
+        word_rankings {string: double}: A dict of {word: ranking}.
+        rank_average (double): The average ranking for our sequences.
+        rng (random.Random): The random source for the walks.
+        published (pair_index.PairIndex=None): If given, skip ladders whose
+            start/end pair has already been published.
+        stats (walker_stats.WalkerStats=None): If given, records the walker
+            counters and the ladders rejected by each filter.
+        ranks (np.ndarray=None): The vertex rankings (see
+            rank_table.rank_array). Worked out from word_rankings if None.
+
+    Yields:
+        (SequenceRank): The ranked ladders, in the order they were generated.
+            Ladders are validated and ranked RANK_BATCH at a time (with the
+            same results as calculate_rank), so they come out in bursts.
+    """
+    if ranks is None:
+        ranks = rank_table.rank_array(g, word_rankings, rank_average)
+    generated = 0
+    # Ladders waiting to be validated and ranked.
+    pending = []
+    for start_word in start_words:
+        # Settle the batch once it's full, or once it could be enough to
+        # finish (some of it may still turn out to be invalid).
+        if len(pending) >= RANK_BATCH or generated + len(pending) >= count:
+            valid = _validate_batch(pending, stats)
+            generated += len(valid)
+            yield from _rank_batch(g, ranks, valid)
+            pending = []
+        if generated >= count:
+            break
+
+        if hardness is not None:
+            # The true shortest ladder has exactly `hardness` steps, so there
+            # are no over-long walks to generate and then throw away.
+            result = hardness_sampler.sample_ladder_at_distance(
+                g, start_word, hardness, rng
+            )
+        else:
+            result = walker.walk(start_word, steps, rng, stats)
+        # The walker only returns an empty list when there really is no
+        # ladder of this length from the start word, so just move on.
+        if not result:
+            if stats is not None:
+                stats.reject('no_ladder')
+            continue
+        if published is not None and \
+                published.contains(result[0], result[-1]):
+            if stats is not None:
+                stats.reject('published')
+            continue
+        pending.append(result)
+    yield from _rank_batch(g, ranks, _validate_batch(pending, stats))
+
+
+def _validate_batch(sequences, stats=None):
+    # batch_validation.validate_ladders needs ladders of one length, so
+    # check each length on its own and keep the valid ladders in order.
+    by_length = {}
+    for i, sequence in enumerate(sequences):
+        by_length.setdefault(len(sequence), []).append(i)
+    valid = [True] * len(sequences)
+    for indexes in by_length.values():
+        mask, _ = batch_validation.validate_ladders(
+            [sequences[i] for i in indexes]
+        )
+        for i, ok in zip(indexes, mask):
+            valid[i] = bool(ok)
+    if stats is not None and not all(valid):
+        stats.reject('invalid', valid.count(False))
+    return [s for s, ok in zip(sequences, valid) if ok]
+
+
+def _rank_batch(g, ranks, sequences):
+    return [
+        SequenceRank(sequence, rank) for sequence, rank in zip(
+            sequences, rank_table.rank_ladders(g, ranks, sequences)
+        )
+    ]
+
+
+def split_start_words(words, jobs, iterations, seed):
     """
+    Shuffle the start words and deal them out between workers so that no
+    start word is used twice. The split only depends on `seed` and `jobs`, so
+    the generated ladders are reproducible.
 
+    Args:
+        words [string]: The available start words.
+        jobs (int): The number of workers.
+        iterations (int): The total number of ladders to generate.
+        seed (int): The seed for shuffling and for each worker's RNG.
+
+    Returns:
+        [([string], int, int)]: For each worker, its start words, how many
+            ladders it should generate and the seed for its RNG.
+    """
+    rng = random.Random(seed)
+    start_words = sorted(words)
+    rng.shuffle(start_words)
+    return [
+        (
+            start_words[i::jobs],
+            iterations // jobs + (1 if i < iterations % jobs else 0),
+            rng.getrandbits(64)
+        )
+        for i in range(jobs)
+    ]
+
+
+# Per-process state for worker processes, set up once by _init_worker so the
+# graph is never pickled per task.
+_worker_state = {}
+
+
+def make_walker(g, steps, word_rankings, weighted=False, min_rank=None):
+    """
+    Build the ladder walker for a run, optionally rank-aware (see
+    ladder_walker.LadderWalker).
+    """
+    if not weighted and min_rank is None:
+        return ladder_walker.LadderWalker(g, steps)
+    return ladder_walker.LadderWalker(
+        g, steps, word_rankings, min_rank=min_rank, weighted=weighted
+    )
+
+
+def _init_worker(binary_graph_path, word_rankings, rank_average, steps,
+                 weighted, min_rank, published_path):
+    g = csr_graph.CSRGraph()
+    # The binary graph is memory-mapped, so every worker shares the same
+    # physical pages instead of holding its own copy.
+    g.load_binary(binary_graph_path)
+    _worker_state['graph'] = g
+    _worker_state['walker'] = make_walker(
+        g, steps, word_rankings, weighted, min_rank
+    )
+    _worker_state['word_rankings'] = word_rankings
+    _worker_state['rank_average'] = rank_average
+    _worker_state['ranks'] = rank_table.rank_array(
+        g, word_rankings, rank_average
+    )
+    # Like the graph, the published pair index is memory-mapped and shared.
+    _worker_state['published'] = (
+        pair_index.PairIndex(published_path) if published_path else None
+    )
+
+
+def _generate_in_worker(start_words, count, steps, hardness, rng_state,
+                        collect_stats):
+    rng = random.Random()
+    rng.setstate(rng_state)
+    stats = walker_stats.WalkerStats() if collect_stats else None
+    sequences = list(generate_sequences(
+        _worker_state['graph'],
+        _worker_state['walker'],
+        start_words,
+        count,
+        steps,
+        hardness,
+        _worker_state['word_rankings'],
+        _worker_state['rank_average'],
+        rng,
+        _worker_state['published'],
+        stats,
+        _worker_state['ranks']
+    ))
+    return sequences, rng.getstate(), stats
+
+
+def generate_parallel(g, graph_path, chunks, steps, hardness, word_rankings,
+                      rank_average, weighted=False, min_rank=None,
+                      published_path=None, batch_size=1000, stats=None):
+    """
+    Run generate_sequences for each chunk from split_start_words in a process
+    pool. Each chunk is worked through in batches of `batch_size` start words
+    (carrying its RNG state from batch to batch) so only a few batches of
+    results are ever held at once. If `stats` is given, each worker's
+    counters are merged into it as its batches come back.
+
+    Yields:
+        (SequenceRank): The ranked ladders. The order only depends on the
+            chunks, not on how the workers are scheduled.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if csr_graph.is_binary_graph(graph_path):
+            binary_graph_path = graph_path
+        else:
+            binary_graph_path = os.path.join(temp_dir, 'graph.bin')
+            g.save_binary(binary_graph_path)
+
+        with ProcessPoolExecutor(
+            max_workers=len(chunks),
+            initializer=_init_worker,
+            initargs=(
+                binary_graph_path, word_rankings, rank_average, steps,
+                weighted, min_rank, published_path
+            )
+        ) as pool:
+            # [start words, next position, ladders still needed, future]
+            workers = []
+            for start_words, count, seed in chunks:
+                workers.append([start_words, 0, count, None])
+                rng_state = random.Random(seed).getstate()
+                _submit_batch(pool, workers[-1], steps, hardness, rng_state,
+                              batch_size, stats is not None)
+
+            while any(worker[3] for worker in workers):
+                # Collect batches round-robin in chunk order so the output is
+                # deterministic.
+                for worker in workers:
+                    if worker[3] is None:
+                        continue
+                    sequences, rng_state, worker_stats = worker[3].result()
+                    worker[3] = None
+                    worker[2] -= len(sequences)
+                    if worker_stats is not None:
+                        stats.merge(worker_stats)
+                    _submit_batch(pool, worker, steps, hardness, rng_state,
+                                  batch_size, stats is not None)
+                    yield from sequences
+
+
+def _submit_batch(pool, worker, steps, hardness, rng_state, batch_size,
+                  collect_stats):
+    start_words, position, remaining, _ = worker
+    if remaining <= 0 or position >= len(start_words):
+        return
+    worker[1] = position + batch_size
+    worker[3] = pool.submit(
+        _generate_in_worker,
+        start_words[position:position + batch_size],
+        remaining,
+        steps,
+        hardness,
+        rng_state,
+        collect_stats
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Generate ranked word ladders for the website.'
+    )
     # The number of times to run the ladder generation sequence. Equivalent to
     # the number of ladder sequences we want to generate.
-    iterations = 730*5
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=730*5,
+        help='The number of ladders to generate'
+    )
     # How many steps do we want from the start of each word to its end? Making
     # this number larger generally makes the ladders harder (though that's not
     # always the case) and reducese the solution space.
-    intermediary_steps = 3
-    # We add in two additional steps to account for the jumps after the start
-    # word and before the end word.
-    steps = intermediary_steps + 2
+    parser.add_argument(
+        '--steps',
+        type=int,
+        default=3,
+        help='The number of intermediary words in each random ladder'
+    )
+    parser.add_argument(
+        '--hardness',
+        type=int,
+        default=None,
+        help=(
+            'Instead of random walks, pick end words whose shortest ladder '
+            'is exactly this many steps long and emit that shortest ladder'
+        )
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='The number of worker processes to generate ladders with'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Seed for reproducible output (for a given number of jobs)'
+    )
+    parser.add_argument(
+        '--weighted',
+        action='store_true',
+        help='Prefer common words by weighting each step by word rank'
+    )
+    parser.add_argument(
+        '--min-rank',
+        type=float,
+        default=None,
+        help='Never use words ranked below this in random-walk ladders'
+    )
+    parser.add_argument(
+        '--published',
+        default=None,
+        help=(
+            'A pair index of start/end pairs published by earlier runs. '
+            'Those pairs are skipped and this run\'s pairs are added to it'
+        )
+    )
+    parser.add_argument(
+        '--top-k',
+        type=int,
+        default=None,
+        help='Only keep the best K ladders (in a bounded heap)'
+    )
+    parser.add_argument(
+        '--stream-dir',
+        default=None,
+        help='Also write every accepted ladder to CSV here as it arrives'
+    )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=1,
+        help='Split the streamed ladders into this many rank buckets'
+    )
+    parser.add_argument(
+        '--shard-bounds',
+        type=float,
+        nargs='+',
+        default=None,
+        help=(
+            'The ranks to split the shards at (one fewer than --shards). By '
+            'default they are the rank quantiles of the first chunk of '
+            'ladders'
+        )
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=1000,
+        help='How many streamed rows to buffer before writing them out'
+    )
+    parser.add_argument(
+        '--bundle',
+        default=None,
+        help=(
+            'Load the graph, start words and rankings from a startup bundle '
+            '(built with bundle.py compile) instead of the source files. A '
+            'bundle older than its sources is refused'
+        )
+    )
+    parser.add_argument(
+        '--stats',
+        default=None,
+        help=(
+            'Record walker counters, stage timings and rejected ladders, and '
+            'append a JSON-lines summary of the run to this file'
+        )
+    )
+    return parser
+
+
+def input_paths():
+    """
+    The source files the generator reads its inputs from.
 
+    Returns:
+        (string, string, string): The graph, the start word list and the word
+            rankings.
+    """
     # Use this file location to determine the relative paths of other files.
     file_path = os.path.dirname(os.path.abspath(__file__))
-    graph_path = os.path.join(
-        file_path, '..', 'data', 'graph_data', 'graph.json'
+    data_path = os.path.join(file_path, '..', 'data')
+    return (
+        os.path.join(data_path, 'graph_data', 'graph.json'),
+        os.path.join(
+            data_path, 'word_lists', 'even_more_five_letter_words.txt'
+        ),
+        os.path.join(data_path, 'word_rankings', 'word_rank.json'),
     )
 
-    g = graph.Graph()
-    # g.load_graph('/Users/nickrogers/Developer/word_ladder/data/graph_data/graph.json')
-    g.load_graph(graph_path)
 
-    five_letter_words_path = os.path.join(
-        file_path,
-        '..',
-        'data',
-        'word_lists',
-        'even_more_five_letter_words.txt'
-    )
+def load_inputs(stage):
+    """
+    Load the graph (with its component index), the start words and the word
+    rankings from their source files, and work out rank_average.
+
+    Args:
+        stage (function): Returns a context manager that times a named stage
+            (see walker_stats.WalkerStats.stage).
+
+    Returns:
+        (csr_graph.CSRGraph, {string}, {string: double}, double): The graph,
+            the start words, the word rankings and rank_average.
+    """
+    graph_path, five_letter_words_path, word_rank_path = input_paths()
+
+    g = csr_graph.CSRGraph()
+    with stage('load_graph'):
+        # g.load_graph('/Users/nickrogers/Developer/word_ladder/data/graph_data/graph.json')
+        g.load_graph(graph_path)
+        g.components = components.ComponentIndex.load_or_compute(g, graph_path)
+
     # Load in all available words into a set.
     words = set()
     # with open('/Users/nickrogers/Developer/word_ladder/data/word_lists/even_more_five_letter_words.txt', 'r') as words_file:
@@ -172,48 +780,119 @@ def main():
         [words.add(x.strip()) for x in words_file.readlines()]
 
     # Get word rankings
-    word_rank_path = os.path.join(
-        file_path, '..', 'data', 'word_rankings', 'word_rank.json'
-    )
     word_rankings = {}
     # with open('/Users/nickrogers/Developer/word_ladder/data/word_rankings/word_rank.json', 'r') as input_words:
-    with open(word_rank_path, 'r') as input_words:
+    with stage('load_rankings'), open(word_rank_path, 'r') as input_words:
         word_rankings = json.load(input_words)
 
     # Only average words with a rating.
-    rank_average = sum(i for i in word_rankings.values() if i > 0.0) / len(word_rankings)
-
-    sequences = []
-
-    i = 0
-    while i < iterations:
-        start_word = random.choice(list(words))
-        words.remove(start_word)
-
-        result = g.get_random_destination_from_node(start_word, steps)
-        # For some reason the graph will sometimes return an empty list even for words that
-        # can have valid sequences. This will involve more debugging. In the meantime,
-        # just check for empty sequences and move on. CAUTION: this approach might lead to
-        # an infinite loop if there is a word that actually has no solution.
-        if result and graph.is_valid_sequence(result):
-            # print(result)
-            rank = calculate_rank(result, word_rankings, rank_average)
-            sr = SequenceRank(result, rank)
-            sequences.append(sr)
-            i += 1
-
-    sequences.sort(reverse=True)
-    refined_sequences = []
-
-    for seq in sequences:
-        start = seq.sequence[0]
-        end = seq.sequence[-1]
-        rank = distance(start, end)
-        if rank > 1:
-            refined_sequences.append(seq)
-    sequences = refined_sequences
-
-    save_sequences(sequences)
+    rank_average = rank_table.average_rank(word_rankings)
+    return g, words, word_rankings, rank_average
+
+
+def main():
+    """
+    Builds a sequence of ladders for use in our website. This involves running
+    the ladder building operation many times over while randomizing the words
+    each time and not reapeating any start/end sequences.
+    """
+    args = build_parser().parse_args()
+
+    iterations = args.iterations
+    intermediary_steps = args.steps
+    # We add in two additional steps to account for the jumps after the start
+    # word and before the end word.
+    steps = intermediary_steps + 2
+
+    graph_path = input_paths()[0]
+
+    stats = walker_stats.WalkerStats() if args.stats else None
+
+    def stage(name):
+        return stats.stage(name) if stats is not None else nullcontext()
+
+    if args.bundle:
+        # Everything below comes precompiled in one file (see bundle.py).
+        with stage('load_bundle'):
+            # Refuse a bundle compiled from older sources (including the
+            # graph's delta log) rather than silently generating from them.
+            startup = bundle.Bundle(
+                args.bundle, sources=bundle.bundle_sources(*input_paths())
+            )
+            g = startup.graph
+            words = set(startup.start_words)
+            word_rankings = startup.word_rankings
+            rank_average = startup.rank_average
+    else:
+        g, words, word_rankings, rank_average = load_inputs(stage)
+
+    # Skip start words whose component is too small to hold a ladder of the
+    # length we want; they would only waste a walk before being dropped.
+    ladder_length = steps if args.hardness is None else args.hardness + 1
+    words = {
+        w for w in words if g.components.can_hold_path(w, ladder_length)
+    }
+
+    with stage('build_walker'):
+        walker = make_walker(
+            g, steps, word_rankings, args.weighted, args.min_rank
+        )
+        ranks = rank_table.rank_array(g, word_rankings, rank_average)
+
+    seed = args.seed
+    if seed is None:
+        seed = random.randrange(2**32)
+    jobs = max(1, args.jobs)
+    chunks = split_start_words(words, jobs, iterations, seed)
+    published = None
+    if args.published:
+        published = pair_index.PairIndex(args.published)
+
+    if jobs == 1:
+        start_words, count, worker_seed = chunks[0]
+        sequences = generate_sequences(
+            g, walker, start_words, count, steps, args.hardness,
+            word_rankings, rank_average, random.Random(worker_seed),
+            published, stats, ranks
+        )
+    else:
+        sequences = generate_parallel(
+            g, graph_path, chunks, steps, args.hardness, word_rankings,
+            rank_average, args.weighted, args.min_rank, args.published,
+            stats=stats
+        )
+
+    stream = SequenceStream(
+        args.top_k, args.stream_dir, args.shards, args.chunk_size,
+        hardness_engine.HardnessEngine(
+            g, word_rankings, rank_average, ranks=ranks
+        ),
+        args.shard_bounds
+    )
+    # Generation is lazy, so this stage covers walking, ranking and filtering.
+    with stage('generate'):
+        for sequence in sequences:
+            if not stream.add(sequence) and stats is not None:
+                stats.reject('too_easy')
+    with stage('save'):
+        stream.close()
+
+    if published is not None:
+        with stage('publish'):
+            for sequence in stream.best():
+                published.add(sequence.sequence[0], sequence.sequence[-1])
+            published.save()
+
+    if stats is not None:
+        stats.write_jsonl(
+            args.stats,
+            seed=seed,
+            jobs=jobs,
+            steps=steps,
+            hardness=args.hardness,
+            iterations=iterations,
+            accepted=stream.accepted
+        )
 
 
 if __name__ == '__main__':
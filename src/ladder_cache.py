@@ -0,0 +1,362 @@
+import argparse
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+
+import components
+import csr_graph
+import solver
+
+
+def estimate_size(value):
+    """
+    A rough count of the bytes held by a cached value: the containers plus
+    the strings and numbers inside them. Objects shared with the graph (like
+    interned words) are counted anyway, so this errs on the large side.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class LRUCache():
+    """
+    A least-recently-used cache bounded by a number of entries, an estimated
+    number of bytes, or both. Counts hits, misses and evictions.
+    """
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # {key: (value, size)}, least recently used first.
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value):
+        """
+        Add or replace an entry, evicting the least recently used entries
+        until the cache is back within its bounds. A value bigger than
+        max_bytes on its own is not cached.
+        """
+        size = estimate_size(value) if self.max_bytes is not None else 0
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while (self.max_entries is not None
+               and len(self._entries) > self.max_entries) or \
+                (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class SolverCache():
+    """
+    A caching layer in front of shortest-ladder and hint queries on a
+    graph.Graph or csr_graph.CSRGraph.
+
+    Results are cached per (start, end, all_ladders). Underneath, one BFS
+    distance tree is cached per end word (see solver.distance_tree), so every
+    query toward the same end word, from any start word, reuses a single
+    search. A tree covers the end word's whole component, which costs more
+    than one bidirectional search, so it's only built once an end word is
+    asked about a second time (or for a hint). The caches are LRU and are
+    cleared whenever the graph's `version` changes (i.e. a word was added or
+    removed, or a new graph was loaded).
+    """
+    def __init__(self, g, max_results=10000, max_trees=32,
+                 max_result_bytes=None, max_tree_bytes=None):
+        """
+        Args:
+            g (graph.Graph or csr_graph.CSRGraph): The graph to solve against.
+            max_results (int=10000): The most query results to keep.
+            max_trees (int=32): The most distance trees to keep.
+            max_result_bytes (int=None): An optional bound on the estimated
+                size of the cached results.
+            max_tree_bytes (int=None): An optional bound on the estimated size
+                of the cached distance trees.
+        """
+        self.graph = g
+        self.results = LRUCache(max_results, max_result_bytes)
+        self.trees = LRUCache(max_trees, max_tree_bytes)
+        # End words seen once, without a tree built for them yet.
+        self._seen_ends = LRUCache(max_results)
+        self.invalidations = 0
+        self._version = getattr(g, 'version', 0)
+        # The component index attached when the graph last changed, which
+        # no longer describes it (graphs drop their index on edits, but
+        # don't rely on it).
+        self._stale_index = None
+        self._bind()
+
+    def _bind(self):
+        # Look up the graph's current tables; loading a CSRGraph replaces
+        # its ids, words and neighbors, so these are rebound on every change.
+        g = self.graph
+        if isinstance(g, csr_graph.CSRGraph):
+            self._neighbors = g.neighbor_ids
+            self._vertex = g.ids.get
+            self._word = g.words.__getitem__
+        else:
+            self._neighbors = g.get_edges_for_vertex
+            self._vertex = lambda word: word if word in g.edges else None
+            self._word = lambda vertex: vertex
+
+    def _check_version(self):
+        version = getattr(self.graph, 'version', 0)
+        if version != self._version:
+            self.results.clear()
+            self.trees.clear()
+            self._seen_ends.clear()
+            self._version = version
+            self._stale_index = self.graph.components
+            self._bind()
+            self.invalidations += 1
+
+    def distance_tree(self, end):
+        """
+        The cached solver.distance_tree for an end word (keyed by vertex), or
+        None if the word isn't in the graph.
+        """
+        self._check_version()
+        root = self._vertex(end)
+        if root is None:
+            return None
+        depths = self.trees.get(root)
+        if depths is None:
+            depths = solver.distance_tree(self._neighbors, root)
+            self.trees.put(root, depths)
+        return depths
+
+    def _connected(self, start, end):
+        self._check_version()
+        index = self.graph.components
+        if self._vertex(start) is None or self._vertex(end) is None:
+            return False
+        if not index or index is self._stale_index:
+            return True
+        return index.connected(start, end)
+
+    def shortest_ladder(self, start, end, all_ladders=False):
+        """
+        The cached version of graph.Graph.shortest_ladder (same arguments and
+        results, though with several shortest ladders it may pick a different
+        one).
+        """
+        self._check_version()
+        key = (start, end, all_ladders)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+
+        ladders = []
+        if not self._connected(start, end):
+            # Don't build (and cache) a whole tree to find out two words in
+            # different components aren't connected.
+            pass
+        elif self._vertex(end) not in self.trees and \
+                end not in self._seen_ends:
+            self._seen_ends.put(end, True)
+            ladders = [
+                [self._word(v) for v in ladder]
+                for ladder in solver.shortest_ladders(
+                    self._neighbors,
+                    self._vertex(start),
+                    self._vertex(end),
+                    all_ladders
+                )
+            ]
+        else:
+            ladders = [
+                [self._word(v) for v in ladder]
+                for ladder in solver.ladders_from_tree(
+                    self._neighbors,
+                    self.distance_tree(end),
+                    self._vertex(start),
+                    all_ladders
+                )
+            ]
+        result = ladders if all_ladders else (ladders[0] if ladders else [])
+        self.results.put(key, result)
+        return result
+
+    def distance(self, start, end):
+        """
+        The number of steps in the shortest ladder between two words, or None
+        if there isn't one.
+        """
+        if not self._connected(start, end):
+            return None
+        return self.distance_tree(end).get(self._vertex(start))
+
+    def hint(self, start, end):
+        """
+        The next word on a shortest ladder from `start` (e.g. the player's
+        current word) to `end`, or None if there isn't one.
+        """
+        ladder = self.shortest_ladder(start, end)
+        return ladder[1] if len(ladder) > 1 else None
+
+    def stats(self):
+        return {
+            'results': self.results.stats(),
+            'trees': self.trees.stats(),
+            'invalidations': self.invalidations,
+        }
+
+
+def benchmark(g, pairs=50, queries=20000, seed=0):
+    """
+    Compare uncached solving with SolverCache on a query stream that keeps
+    asking about the same few pairs (like players on a daily puzzle). Each
+    query is either a full ladder or a hint from somewhere along the ladder.
+
+    Returns:
+        (dict): The timings for both and the cache stats.
+    """
+    rng = random.Random(seed)
+    words = sorted(g.vertices())
+    daily = [(rng.choice(words), rng.choice(words)) for _ in range(pairs)]
+    stream = [rng.choice(daily) for _ in range(queries)]
+
+    begin = time.perf_counter()
+    for start, end in stream:
+        g.shortest_ladder(start, end)
+    uncached_seconds = time.perf_counter() - begin
+
+    cache = SolverCache(g)
+    begin = time.perf_counter()
+    for start, end in stream:
+        ladder = cache.shortest_ladder(start, end)
+        if len(ladder) > 2:
+            cache.hint(ladder[rng.randrange(1, len(ladder) - 1)], end)
+    cached_seconds = time.perf_counter() - begin
+
+    return {
+        'queries': queries,
+        'uncached_seconds': uncached_seconds,
+        'cached_seconds': cached_seconds,
+        'stats': cache.stats(),
+    }
+
+
+def check_reload(graph_path, pairs=200, seed=0):
+    """
+    Check that a SolverCache follows its CSRGraph through a reload. The cache
+    is warmed on a copy of the graph with every other word dropped (so the
+    vertex ids all shift), then the full graph is loaded into the same
+    object and every pair is asked again.
+
+    Returns:
+        [(string, string)]: The pairs where the cache's shortest ladder is a
+            different length from g.shortest_ladder's.
+    """
+    full = csr_graph.CSRGraph()
+    full.load_graph(graph_path)
+    edges = full.to_edges()
+    dropped = set(sorted(edges)[::2])
+    g = csr_graph.CSRGraph.from_edges({
+        word: [n for n in neighbors if n not in dropped]
+        for word, neighbors in edges.items() if word not in dropped
+    })
+
+    rng = random.Random(seed)
+    words = sorted(full.vertices())
+    queries = [(rng.choice(words), rng.choice(words)) for _ in range(pairs)]
+    cache = SolverCache(g)
+    for start, end in queries:
+        cache.shortest_ladder(start, end)
+        cache.distance(start, end)
+
+    g.load_graph(graph_path)
+    return [
+        (start, end) for start, end in queries
+        if len(cache.shortest_ladder(start, end))
+        != len(g.shortest_ladder(start, end))
+    ]
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Measure the shortest-ladder cache on repeated queries.'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to load (JSON or binary)'
+    )
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Check the cache gives the same answers after a graph reload'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.check:
+        mismatches = check_reload(args.graph, args.pairs * 4, args.seed)
+        if mismatches:
+            print('{} pairs differ after a reload, e.g. {}'.format(
+                len(mismatches), mismatches[0]
+            ))
+            sys.exit(1)
+        print('The cache matches the reloaded graph.')
+        return
+
+    g = csr_graph.CSRGraph()
+    g.load_graph(args.graph)
+    g.components = components.ComponentIndex.load_or_compute(g, args.graph)
+    results = benchmark(g, args.pairs, args.queries, args.seed)
+    print(', '.join(
+        '{}: {}'.format(key, value) for key, value in results.items()
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import components
+import csr_graph
+import hardness_engine
+import hardness_sampler
+import ladder_builder
+import ladder_cache
+import ladder_walker
+import path_counts
+import rank_table
+
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+# Requests with a bigger body than this are refused.
+MAX_BODY_SIZE = 1024 * 1024
+# The longest ladders /generate will make. The walker's table grows with the
+# ladder length and its search can blow up on long walks, so bigger requests
+# are refused rather than tying up a worker.
+MAX_STEPS = 10
+MAX_HARDNESS = 20
+
+
+class RequestError(Exception):
+    """
+    A request the service can't answer, along with the HTTP status to send.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Loaded once per worker process by _init_worker.
+_worker_state = {}
+
+
+def _init_worker(binary_graph_path, index, word_rankings, rank_average):
+    g = csr_graph.CSRGraph()
+    # Memory-mapped, so every worker shares the same physical pages.
+    g.load_binary(binary_graph_path)
+    g.components = index
+    _worker_state['graph'] = g
+    # Players ask about the same pairs over and over, so solves and hints go
+    # through a per-worker cache.
+    _worker_state['solver'] = ladder_cache.SolverCache(g)
+    _worker_state['walker'] = ladder_walker.LadderWalker(g)
+    _worker_state['engine'] = hardness_engine.HardnessEngine(
+        g, word_rankings, rank_average
+    )
+    _worker_state['word_rankings'] = word_rankings
+    _worker_state['rank_average'] = rank_average
+    _worker_state['start_words'] = [
+        w for i, w in enumerate(g.words) if g.degree(i)
+    ]
+
+
+def _ping():
+    return os.getpid()
+
+
+def generate_ladder(start=None, steps=5, hardness=None, seed=None,
+                    attempts=20):
+    """
+    Generate one ranked ladder in a worker process.
+
+    Args:
+        start (string=None): The start word. Picked at random if None.
+        steps (int=5): The number of words in a random-walk ladder.
+        hardness (int=None): If given, generate a shortest ladder of exactly
+            this many steps instead of a random walk.
+        seed (int=None): Seed for a reproducible ladder.
+        attempts (int=20): How many start words to try before giving up.
+
+    Returns:
+        (dict): The ladder as a ladder_builder.sequence_row, or None if no
+            ladder was found.
+    """
+    g = _worker_state['graph']
+    rng = random.Random(seed) if seed is not None else random
+    for _ in range(attempts):
+        word = start or rng.choice(_worker_state['start_words'])
+        if hardness is not None:
+            result = hardness_sampler.sample_ladder_at_distance(
+                g, word, hardness, rng
+            )
+        else:
+            result = _worker_state['walker'].walk(word, steps, rng)
+        if result:
+            row = ladder_builder.sequence_row(
+                ladder_builder.SequenceRank(
+                    result,
+                    rank_table.rank_ladders(
+                        g, _worker_state['engine'].ranks, [result]
+                    )[0]
+                ),
+                solution_count=int(path_counts.ladder_solution_counts(
+                    g, [result], adjacency=_worker_state['engine'].adjacency
+                )[0]),
+                scores=_worker_state['engine'].score_rows([result])[0]
+            )
+            # Same filter as the generator: one-letter-apart ends are too
+            # easy.
+            if row['hardness'] > 1:
+                return row
+        if start:
+            # Trying the same start word again won't help a shortest ladder
+            # and rarely helps a walk.
+            break
+    return None
+
+
+def solve_ladder(start, end, all_ladders=False):
+    """
+    Find the shortest ladder(s) between two words in a worker process.
+    """
+    result = _worker_state['solver'].shortest_ladder(start, end, all_ladders)
+    return result if all_ladders else [result] if result else []
+
+
+def hint_ladder(start, end):
+    """
+    Find the next word toward `end` and how many steps are left, in a worker
+    process.
+    """
+    cache = _worker_state['solver']
+    return cache.hint(start, end), cache.distance(start, end)
+
+
+def validate_ladder(g, sequence):
+    """
+    Check a ladder against the dictionary.
+
+    Args:
+        g (csr_graph.CSRGraph): The word graph.
+        sequence [string]: The ladder to check.
+
+    Returns:
+        (dict): Whether the ladder is valid and, if not, why: unknown words
+            and adjacent pairs that aren't one letter apart.
+    """
+    failures = []
+    for i, word in enumerate(sequence):
+        if word not in g:
+            failures.append({
+                'step': i, 'word': word, 'reason': 'not in dictionary'
+            })
+    for i in range(len(sequence) - 1):
+        first, second = sequence[i], sequence[i + 1]
+        if first in g and second in g and \
+                second not in g.get_edges_for_vertex(first):
+            failures.append({
+                'step': i,
+                'first': first,
+                'second': second,
+                'reason': 'not one letter apart'
+            })
+    return {'valid': len(sequence) > 1 and not failures, 'failures': failures}
+
+
+def _int_param(query, name, default=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise RequestError(400, '{} must be an integer'.format(name))
+
+
+def _word_param(query, name, required=True):
+    values = query.get(name)
+    if not values:
+        if required:
+            raise RequestError(400, 'missing {}'.format(name))
+        return None
+    return values[0].strip().lower()
+
+
+class LadderService():
+    """
+    An HTTP/1.1 service (asyncio, standard library only) that answers ladder
+    requests from a graph and rankings loaded once at startup:
+
+        GET  /generate?start=&steps=&hardness=&seed=
+        GET  /solve?start=&end=&all=1
+        GET  /hint?start=&end=
+        GET  /validate?sequence=cakes+makes+mates
+        POST /validate  {"ladders": [["cakes", "makes", ...], ...]}
+
+    Generating and solving are CPU-heavy, so they run in a pool of worker
+    processes that share the memory-mapped binary graph; validation is cheap
+    and is answered on the event loop.
+    """
+    def __init__(self, graph_path, word_rank_path, workers=None):
+        self.graph_path = graph_path
+        self.word_rank_path = word_rank_path
+        self.workers = workers or os.cpu_count() or 1
+        self.graph = None
+        self.pool = None
+        self._temp_dir = None
+
+    def load(self):
+        """
+        Load the graph and rankings and start the worker pool.
+        """
+        self.graph = csr_graph.CSRGraph()
+        self.graph.load_graph(self.graph_path)
+        index = components.ComponentIndex.load_or_compute(
+            self.graph, self.graph_path
+        )
+        self.graph.components = index
+
+        with open(self.word_rank_path, 'r') as input_words:
+            word_rankings = json.load(input_words)
+        rank_average = rank_table.average_rank(word_rankings)
+
+        # Workers map a binary copy of the graph as loaded here (with any
+        # delta log replayed), even when --graph is already binary, so every
+        # process sees the same words.
+        self._temp_dir = tempfile.TemporaryDirectory()
+        binary_graph_path = os.path.join(self._temp_dir.name, 'graph.bin')
+        self.graph.save_binary(binary_graph_path)
+
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(binary_graph_path, index, word_rankings, rank_average)
+        )
+        # Start every worker now rather than on the first requests.
+        for future in [self.pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    async def _in_pool(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, function, *args)
+
+    async def generate(self, query):
+        steps = _int_param(query, 'steps', 3)
+        hardness = _int_param(query, 'hardness')
+        start = _word_param(query, 'start', required=False)
+        if start is not None and start not in self.graph:
+            raise RequestError(400, 'unknown word: {}'.format(start))
+        if steps < 0 or (hardness is not None and hardness < 1):
+            raise RequestError(400, 'steps and hardness must be positive')
+        if steps > MAX_STEPS:
+            raise RequestError(
+                400, 'steps must be at most {}'.format(MAX_STEPS)
+            )
+        if hardness is not None and hardness > MAX_HARDNESS:
+            raise RequestError(
+                400, 'hardness must be at most {}'.format(MAX_HARDNESS)
+            )
+        # Like the generator, `steps` counts the intermediary words.
+        row = await self._in_pool(
+            generate_ladder, start, steps + 2, hardness,
+            _int_param(query, 'seed')
+        )
+        if row is None:
+            return {'ladder': None}
+        row['sequence'] = row['sequence'].split(' ')
+        return {'ladder': row}
+
+    async def solve(self, query):
+        start = _word_param(query, 'start')
+        end = _word_param(query, 'end')
+        all_ladders = query.get('all', ['0'])[0] not in ('', '0', 'false')
+        ladders = await self._in_pool(solve_ladder, start, end, all_ladders)
+        return {'ladders': ladders}
+
+    async def hint(self, query):
+        start = _word_param(query, 'start')
+        end = _word_param(query, 'end')
+        word, remaining = await self._in_pool(hint_ladder, start, end)
+        return {'hint': word, 'steps': remaining}
+
+    def validate(self, query, body):
+        if body:
+            try:
+                ladders = json.loads(body)['ladders']
+            except (ValueError, KeyError, TypeError):
+                ladders = None
+            if not isinstance(ladders, list) or not all(
+                    isinstance(ladder, list)
+                    and all(isinstance(w, str) for w in ladder)
+                    for ladder in ladders):
+                raise RequestError(
+                    400, 'expected a JSON body like {"ladders": [[...]]}'
+                )
+        else:
+            ladders = [_word_param(query, 'sequence').split()]
+        return {
+            'results': [
+                validate_ladder(self.graph, [w.lower() for w in ladder])
+                for ladder in ladders
+            ]
+        }
+
+    async def dispatch(self, method, target, body):
+        """
+        Route a request.
+
+        Returns:
+            (int, dict): The HTTP status and the JSON payload.
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        try:
+            if url.path == '/validate':
+                if method not in ('GET', 'POST'):
+                    raise RequestError(405, 'use GET or POST')
+                return 200, self.validate(query, body)
+            handler = {
+                '/generate': self.generate,
+                '/solve': self.solve,
+                '/hint': self.hint,
+            }.get(url.path)
+            if handler is not None:
+                if method != 'GET':
+                    raise RequestError(405, 'use GET')
+                return 200, await handler(query)
+            raise RequestError(404, 'unknown path: {}'.format(url.path))
+        except RequestError as e:
+            return e.status, {'error': str(e)}
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve requests on one connection until the client closes it (or
+        asks to with Connection: close).
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = \
+                        request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(
+                        writer, 400, {'error': 'bad request line'}, False
+                    )
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' \
+                    and version != 'HTTP/1.0'
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(
+                        writer, 400, {'error': 'bad Content-Length'}, False
+                    )
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(
+                        writer, 413, {'error': 'body too large'}, False
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        writer.write((
+            'HTTP/1.1 {} {}\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: {}\r\n'
+            'Connection: {}\r\n'
+            '\r\n'
+        ).format(
+            status, STATUS_TEXT[status], len(body),
+            'keep-alive' if keep_alive else 'close'
+        ).encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(
+            self.handle_connection, host, port
+        )
+        print('Serving on http://{}:{} with {} workers'.format(
+            host, port, self.workers
+        ))
+        async with server:
+            await server.serve_forever()
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Serve ladder generation, solving and validation over HTTP.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Worker processes for generate/solve (defaults to the CPU count)'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to serve (JSON or binary)'
+    )
+    parser.add_argument(
+        '--word-rank',
+        default=os.path.join(
+            file_path, '..', 'data', 'word_rankings', 'word_rank.json'
+        ),
+        help='The word rankings used to rank generated ladders'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    service = LadderService(args.graph, args.word_rank, args.workers)
+    service.load()
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
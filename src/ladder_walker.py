@@ -0,0 +1,320 @@
+import argparse
+import os
+import random
+import time
+from array import array
+from bisect import bisect_right
+
+import csr_graph
+import graph
+import walker_stats
+
+
+class LadderWalker():
+    """
+    A random ladder walker that never restarts from the start word.
+
+    For every vertex and remaining depth `d` we precompute whether a walk of
+    `d` vertices can still be made from that vertex (`feasible[d][v]`). This
+    is an over-approximation of "a simple path of `d` vertices exists", so a
+    vertex that fails the check can never be part of a ladder and is never
+    stepped into. The walk itself is a randomized DFS over feasible children
+    that backs up one vertex at a time when the rest of the path runs into
+    itself, so it only returns an empty result when no ladder of that length
+    exists from the start word.
+
+    Given word rankings, the walker can also skip words below a minimum rank
+    (they're left out of the feasibility table entirely) and, when asked to,
+    prefer common words by picking each child with probability proportional
+    to its rank, so ladders meet the quality bar as they're built instead of
+    being scored and thrown away afterwards. Children are picked uniformly
+    unless `weighted` is set.
+    """
+    def __init__(self, g, max_steps=0, word_rankings=None, min_rank=None,
+                 weight_floor=0.01, weighted=False):
+        """
+        Args:
+            g (csr_graph.CSRGraph): The graph to walk.
+            max_steps (int=0): Precompute the feasibility table up to this
+                many steps. The table is extended on demand for longer walks.
+            word_rankings {string: double}: The word rankings (from
+                word_rank.json), used by `min_rank` and `weighted`.
+            min_rank (double=None): If given, never use words ranked below
+                this (or missing from `word_rankings`).
+            weight_floor (double=0.01): The smallest weight a usable word
+                gets, so words ranked 0 can still be picked.
+            weighted (bool=False): Pick children weighted by their rank in
+                `word_rankings` instead of uniformly.
+        """
+        self.graph = g
+        self.allowed = bytearray(b'\x01' * len(g))
+        if min_rank is not None:
+            rankings = word_rankings or {}
+            for v, word in enumerate(g.words):
+                if rankings.get(word, -1.0) < min_rank:
+                    self.allowed[v] = 0
+
+        # cumulative[i] is the total weight of neighbors[0..i], so the weights
+        # of any vertex's children are a slice of one prefix-sum array.
+        self.weights = None
+        self.cumulative = None
+        if weighted:
+            word_rankings = word_rankings or {}
+            self.weights = array('d', (
+                max(word_rankings.get(word, 0.0), weight_floor)
+                if self.allowed[v] else 0.0
+                for v, word in enumerate(g.words)
+            ))
+            self.cumulative = array('d')
+            total = 0.0
+            for n in g.neighbors:
+                total += self.weights[n]
+                self.cumulative.append(total)
+
+        # feasible[d][v] is 1 if a walk of d vertices can start at v.
+        self.feasible = [None, bytearray(self.allowed)]
+        self._extend_table(max_steps)
+
+    def _extend_table(self, steps):
+        g = self.graph
+        offsets = g.offsets
+        neighbors = g.neighbors
+        while len(self.feasible) <= steps:
+            previous = self.feasible[-1]
+            current = bytearray(len(g))
+            for v in range(len(g)):
+                if not self.allowed[v]:
+                    continue
+                for i in range(offsets[v], offsets[v + 1]):
+                    if previous[neighbors[i]]:
+                        current[v] = 1
+                        break
+            self.feasible.append(current)
+
+    def is_feasible(self, word, steps):
+        """
+        Check whether a ladder of `steps` words might start at `word`. A False
+        result means no such ladder exists.
+        """
+        self._extend_table(steps)
+        return bool(self.feasible[steps][self.graph.vertex_id(word)])
+
+    def _candidates(self, vertex, remaining, on_path, rng):
+        feasible = self.feasible[remaining]
+        children = [
+            n for n in self.graph.neighbor_ids(vertex)
+            if feasible[n] and n not in on_path
+        ]
+        rng.shuffle(children)
+        return children
+
+    def _pick_weighted(self, vertex, remaining, on_path, tried, rng):
+        """
+        Pick a random usable child of `vertex`, weighted by rank, that hasn't
+        been tried from this position yet. Returns None if there isn't one.
+        """
+        offsets = self.graph.offsets
+        neighbors = self.graph.neighbors
+        feasible = self.feasible[remaining]
+        lo = offsets[vertex]
+        hi = offsets[vertex + 1]
+        if lo == hi:
+            return None
+
+        base = self.cumulative[lo - 1] if lo else 0.0
+        span = self.cumulative[hi - 1] - base
+        if span > 0.0:
+            # Draw from the precomputed cumulative weights, rejecting children
+            # that can't be used. This nearly always succeeds first time.
+            for _ in range(hi - lo):
+                i = bisect_right(
+                    self.cumulative, base + rng.random() * span, lo, hi
+                )
+                n = neighbors[min(i, hi - 1)]
+                if feasible[n] and n not in on_path and n not in tried:
+                    return n
+
+        options = [
+            n for n in neighbors[lo:hi]
+            if feasible[n] and n not in on_path and n not in tried
+        ]
+        if not options:
+            return None
+        return rng.choices(
+            options, weights=[self.weights[n] for n in options]
+        )[0]
+
+    def _walk_weighted(self, start_id, steps, rng, stats):
+        path = [start_id]
+        on_path = {start_id}
+        tried = [set()]
+        while len(path) < steps:
+            remaining = steps - len(path)
+            vertex = self._pick_weighted(
+                path[-1], remaining, on_path, tried[-1], rng
+            )
+            if vertex is None:
+                # Every child leads back into the path; back up one vertex.
+                tried.pop()
+                on_path.discard(path.pop())
+                if stats is not None:
+                    stats['backtracks'] = stats.get('backtracks', 0) + 1
+                if not path:
+                    return []
+            else:
+                tried[-1].add(vertex)
+                path.append(vertex)
+                on_path.add(vertex)
+                if stats is not None:
+                    stats['expanded'] = stats.get('expanded', 0) + 1
+                    if len(path) > stats.get('peak_depth', 0):
+                        stats['peak_depth'] = len(path)
+                tried.append(set())
+
+        return [self.graph.words[v] for v in path]
+
+    def walk(self, start, steps, rng=None, stats=None):
+        """
+        Build a random ladder of `steps` words beginning at `start`.
+
+        Args:
+            start (string): The start word.
+            steps (int): The number of words in the ladder (including the
+                start and end words).
+            rng (random.Random=None): The random source to use. Defaults to
+                the `random` module.
+            stats (dict=None): If given (usually a walker_stats.WalkerStats),
+                'calls' is incremented once, 'expanded' for each vertex added
+                to the ladder and 'backtracks' for each vertex that had to be
+                backed out of. 'peak_depth' holds the longest path reached,
+                as it does for graph.Graph's walker.
+
+        Returns:
+            [string]: The ladder, or an empty list if no ladder of this length
+                exists from `start`.
+        """
+        rng = rng or random
+        if stats is not None:
+            stats['calls'] = stats.get('calls', 0) + 1
+        self._extend_table(steps)
+        start_id = self.graph.vertex_id(start)
+        if steps < 1 or not self.feasible[steps][start_id]:
+            return []
+        if self.cumulative is not None:
+            return self._walk_weighted(start_id, steps, rng, stats)
+
+        path = [start_id]
+        on_path = {start_id}
+        choices = [self._candidates(start_id, steps - 1, on_path, rng)]
+        while len(path) < steps:
+            options = choices[-1]
+            if options:
+                vertex = options.pop()
+                path.append(vertex)
+                on_path.add(vertex)
+                if stats is not None:
+                    stats['expanded'] = stats.get('expanded', 0) + 1
+                    if len(path) > stats.get('peak_depth', 0):
+                        stats['peak_depth'] = len(path)
+                remaining = steps - len(path)
+                if remaining:
+                    choices.append(
+                        self._candidates(vertex, remaining, on_path, rng)
+                    )
+            else:
+                # Every child leads back into the path; back up one vertex.
+                choices.pop()
+                on_path.discard(path.pop())
+                if stats is not None:
+                    stats['backtracks'] = stats.get('backtracks', 0) + 1
+                if not path:
+                    return []
+
+        return [self.graph.words[v] for v in path]
+
+
+def benchmark(graph_path, ladders=2000, steps=5, seed=0):
+    """
+    Compare restarts per ladder for graph.Graph's walker against backtracks
+    per ladder for LadderWalker.
+
+    Args:
+        graph_path (string): The graph.json to load.
+        ladders (int=2000): The number of ladders to build with each walker.
+        steps (int=5): The number of words per ladder.
+        seed (int=0): The seed for picking start words and walking.
+
+    Returns:
+        (dict): The counts and timings for both walkers.
+    """
+    old_graph = graph.Graph()
+    old_graph.load_graph(graph_path)
+    g = csr_graph.CSRGraph()
+    g.load_graph(graph_path)
+    walker = LadderWalker(g, steps)
+
+    rng = random.Random(seed)
+    candidates = [w for w in g.words if g.has_children(w)]
+    starts = [rng.choice(candidates) for _ in range(ladders)]
+
+    old_stats = walker_stats.WalkerStats()
+    random.seed(seed)
+    begin = time.perf_counter()
+    old_empty = 0
+    for start in starts:
+        if not old_graph.get_random_destination_from_node(
+                start, steps, old_stats):
+            old_empty += 1
+    old_seconds = time.perf_counter() - begin
+
+    stats = walker_stats.WalkerStats()
+    rng = random.Random(seed)
+    begin = time.perf_counter()
+    new_empty = 0
+    for start in starts:
+        if not walker.walk(start, steps, rng, stats):
+            new_empty += 1
+    new_seconds = time.perf_counter() - begin
+
+    return {
+        'ladders': ladders,
+        'steps': steps,
+        'old_restarts_per_ladder': old_stats.get('restarts', 0) / ladders,
+        'old_bailouts': old_stats.get('bailouts', 0),
+        'old_empty_results': old_empty,
+        'old_seconds': old_seconds,
+        'new_backtracks_per_ladder': stats.get('backtracks', 0) / ladders,
+        'new_empty_results': new_empty,
+        'new_seconds': new_seconds,
+    }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Compare graph.Graph restarts with LadderWalker.'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph.json to load'
+    )
+    parser.add_argument('--ladders', type=int, default=2000)
+    parser.add_argument(
+        '--steps', type=int, nargs='+', default=[5, 6, 7, 8]
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    for steps in args.steps:
+        results = benchmark(args.graph, args.ladders, steps, args.seed)
+        print(', '.join(
+            '{}: {}'.format(key, value) for key, value in results.items()
+        ))
+
+
+if __name__ == '__main__':
+    main()
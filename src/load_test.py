@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import time
+from urllib.parse import urlencode
+
+
+ENDPOINTS = ('generate', 'solve', 'validate')
+
+
+def build_requests(ladders_path, endpoint, count, seed=0):
+    """
+    Build a reproducible list of requests for the ladder service, using
+    previously generated ladders for the solve and validate words.
+
+    Args:
+        ladders_path (string): A generated ladders CSV.
+        endpoint (string): One of ENDPOINTS, or 'mix' for all of them.
+        count (int): The number of requests.
+        seed (int=0): The seed for picking requests.
+
+    Returns:
+        [(string, string, string, bytes)]: (endpoint, method, target, body)
+            for each request.
+    """
+    with open(ladders_path, 'r') as input_file:
+        ladders = [row['sequence'].split(' ')
+                   for row in csv.DictReader(input_file)]
+
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        name = endpoint if endpoint != 'mix' else rng.choice(ENDPOINTS)
+        ladder = rng.choice(ladders)
+        if name == 'generate':
+            target = '/generate?' + urlencode(
+                {'steps': rng.randint(3, 6), 'seed': rng.randrange(2**32)}
+            )
+            requests.append((name, 'GET', target, b''))
+        elif name == 'solve':
+            target = '/solve?' + urlencode(
+                {'start': ladder[0], 'end': ladder[-1]}
+            )
+            requests.append((name, 'GET', target, b''))
+        else:
+            body = json.dumps({'ladders': [ladder]}).encode('utf-8')
+            requests.append((name, 'POST', '/validate', body))
+    return requests
+
+
+async def _send(reader, writer, host, method, target, body):
+    writer.write((
+        '{} {} HTTP/1.1\r\n'
+        'Host: {}\r\n'
+        'Content-Type: application/json\r\n'
+        'Content-Length: {}\r\n'
+        '\r\n'
+    ).format(method, target, host, len(body)).encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, queue, latencies, errors):
+    # One keep-alive connection per client, like a browser would use.
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                name, method, target, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            start = time.perf_counter()
+            status = await _send(reader, writer, host, method, target, body)
+            latencies[name].append(time.perf_counter() - start)
+            if status != 200:
+                errors[name] = errors.get(name, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentile(values, p):
+    """
+    The nearest-rank `p`th percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(p / 100 * len(ordered))) - 1)]
+
+
+async def run(host, port, requests, concurrency):
+    """
+    Send the requests with `concurrency` clients.
+
+    Returns:
+        (dict, dict, double): {endpoint: [latency seconds]},
+            {endpoint: non-200 responses} and the total run time.
+    """
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies = {name: [] for name in ENDPOINTS}
+    errors = {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, queue, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    return latencies, errors, time.perf_counter() - start
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Load test the ladder service and report p50/p99 latency.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument(
+        '--endpoint', choices=ENDPOINTS + ('mix',), default='mix'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--ladders',
+        default=os.path.join(
+            file_path, '..', 'data', 'output', 'generated_ladders_2.csv'
+        ),
+        help='Generated ladders to draw solve/validate words from'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    requests = build_requests(
+        args.ladders, args.endpoint, args.requests, args.seed
+    )
+    latencies, errors, seconds = asyncio.run(
+        run(args.host, args.port, requests, args.concurrency)
+    )
+
+    print('{} requests in {:.2f}s ({:.0f} requests/s)'.format(
+        len(requests), seconds, len(requests) / seconds
+    ))
+    for name in ENDPOINTS:
+        values = latencies[name]
+        if not values:
+            continue
+        print('{:<9} n={:<6} p50={:.2f}ms p99={:.2f}ms errors={}'.format(
+            name,
+            len(values),
+            percentile(values, 50) * 1000,
+            percentile(values, 99) * 1000,
+            errors.get(name, 0)
+        ))
+
+
+if __name__ == '__main__':
+    main()
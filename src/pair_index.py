@@ -0,0 +1,208 @@
+import argparse
+import csv
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+
+# Pair index file layout (little-endian):
+#   header:       magic, format version, pair count, bloom filter size in
+#                 bits, number of bloom hash functions
+#   bloom filter: (bits + 7) // 8 bytes, padded to a multiple of 8
+#   fingerprints: pair count sorted uint64 pair fingerprints
+INDEX_MAGIC = b'WLPI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sIQQI4x')
+
+# The target false-positive rate of the bloom filter. A bloom hit is always
+# confirmed against the sorted fingerprints, so this only affects speed.
+FALSE_POSITIVE_RATE = 0.01
+
+
+def pair_fingerprint(start, end):
+    """
+    A 64-bit fingerprint of an ordered (start, end) pair.
+    """
+    digest = hashlib.blake2b(
+        '{}\0{}'.format(start, end).encode('utf-8'), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _bloom_positions(fingerprint, bits, hash_count):
+    # Double hashing: derive every bloom hash from the two halves of the
+    # fingerprint.
+    h1 = fingerprint & 0xffffffff
+    h2 = (fingerprint >> 32) | 1
+    return [(h1 + i * h2) % bits for i in range(hash_count)]
+
+
+class PairIndex():
+    """
+    A persistent set of (start, end) pairs that have already been published,
+    so separate runs (and shards) never produce the same pair twice.
+
+    Lookups first check a bloom filter, which answers almost every unseen
+    pair in O(1), and confirm hits against the sorted list of pair
+    fingerprints. Both are memory-mapped straight out of the index file, so
+    loading an index of millions of pairs is close to instant.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        self.bits = 0
+        self.hash_count = 0
+        self.bloom = b''
+        self.fingerprints = array('Q')
+        # Pairs added since the index was loaded (written out by save).
+        self.pending = set()
+        if path is not None and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path):
+        with open(path, 'rb') as input_file:
+            mapped = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, bits, hash_count = \
+            INDEX_HEADER.unpack_from(mapped, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError('{} is not a pair index file.'.format(path))
+        if version != INDEX_VERSION:
+            raise ValueError(
+                'Unsupported pair index version {} in {}.'.format(
+                    version, path
+                )
+            )
+
+        bloom_bytes = _padded_bloom_size(bits)
+        position = INDEX_HEADER.size
+        view = memoryview(mapped)
+        self.bloom = view[position:position + bloom_bytes]
+        position += bloom_bytes
+        fingerprints = view[position:position + count * 8]
+        if sys.byteorder == 'little':
+            self.fingerprints = fingerprints.cast('Q')
+        else:
+            self.fingerprints = array('Q', fingerprints.tobytes())
+            self.fingerprints.byteswap()
+        self.count = count
+        self.bits = bits
+        self.hash_count = hash_count
+        # Keep the mapping open for as long as the views into it are in use.
+        self._mapped = mapped
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def __contains__(self, pair):
+        return self.contains(*pair)
+
+    def contains(self, start, end):
+        """
+        Check whether a (start, end) pair has already been published.
+        """
+        fingerprint = pair_fingerprint(start, end)
+        if fingerprint in self.pending:
+            return True
+        if not self.count:
+            return False
+        for position in _bloom_positions(
+                fingerprint, self.bits, self.hash_count):
+            if not self.bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        i = bisect_left(self.fingerprints, fingerprint)
+        return i < self.count and self.fingerprints[i] == fingerprint
+
+    def add(self, start, end):
+        """
+        Record a (start, end) pair as published. It's saved by save().
+        """
+        self.pending.add(pair_fingerprint(start, end))
+
+    def save(self, path=None):
+        """
+        Merge the pending pairs into the index and write it out, sizing the
+        bloom filter for the new total. The file is written to a temporary
+        path and moved into place.
+
+        Args:
+            path (string=None): Where to save. Defaults to the path the index
+                was loaded from.
+        """
+        path = path or self.path
+        merged = sorted(set(self.fingerprints).union(self.pending))
+        count = len(merged)
+        bits = max(
+            64,
+            int(math.ceil(-count * math.log(FALSE_POSITIVE_RATE)
+                          / (math.log(2) ** 2)))
+        )
+        hash_count = max(1, int(round(bits / max(count, 1) * math.log(2))))
+
+        bloom = bytearray(_padded_bloom_size(bits))
+        for fingerprint in merged:
+            for position in _bloom_positions(fingerprint, bits, hash_count):
+                bloom[position >> 3] |= 1 << (position & 7)
+
+        fingerprints = array('Q', merged)
+        if sys.byteorder != 'little':
+            fingerprints.byteswap()
+
+        temp_path = '{}.tmp'.format(path)
+        with open(temp_path, 'wb') as output_file:
+            output_file.write(INDEX_HEADER.pack(
+                INDEX_MAGIC, INDEX_VERSION, count, bits, hash_count
+            ))
+            output_file.write(bloom)
+            output_file.write(fingerprints.tobytes())
+        # Release the old mapping before replacing the file underneath it.
+        self.bloom = b''
+        self.fingerprints = array('Q')
+        if getattr(self, '_mapped', None) is not None:
+            self._mapped.close()
+            self._mapped = None
+        os.replace(temp_path, path)
+
+        self.path = path
+        self.pending = set()
+        self._load(path)
+
+
+def _padded_bloom_size(bits):
+    # Pad the filter to a multiple of 8 bytes so the fingerprints that follow
+    # it stay aligned.
+    size = (bits + 7) // 8
+    return (size + 7) // 8 * 8
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Record the start/end pairs in generated CSVs as published.'
+    )
+    parser.add_argument('index', help='The pair index file to update')
+    parser.add_argument(
+        'csv_paths', nargs='+', help='Generated ladder CSVs to add'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    index = PairIndex(args.index)
+    before = len(index)
+    for csv_path in args.csv_paths:
+        with open(csv_path, 'r') as input_file:
+            for row in csv.DictReader(input_file):
+                if not index.contains(row['start'], row['end']):
+                    index.add(row['start'], row['end'])
+    index.save(args.index)
+    print('{} pairs ({} new)'.format(len(index), len(index) - before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+import csr_graph
+
+
+# How many start words share one batch of matrix products. Each batch holds a
+# few (vertex count, BATCH_SIZE) int64 matrices; bigger batches stop paying
+# off once the gathered rows no longer fit in cache.
+BATCH_SIZE = 64
+
+
+class Adjacency():
+    """
+    The adjacency matrix of a csr_graph.CSRGraph (entry [i, j] is 1 when
+    words i and j are adjacent), laid out for fast products with a batch of
+    vectors.
+
+    The rows are sorted by degree, and slot k holds the k-th neighbor of
+    every row with more than k neighbors. A product is then one gather and
+    add per slot (as many as the highest degree), all vectorized, instead of
+    a Python loop over the rows.
+    """
+    def __init__(self, g):
+        self.offsets = np.asarray(g.offsets, dtype=np.int64)
+        self.neighbors = np.asarray(g.neighbors, dtype=np.int64)
+        self.size = len(self.offsets) - 1
+        degrees = np.diff(self.offsets)
+        self.order = np.argsort(-degrees, kind='stable')
+        sorted_degrees = degrees[self.order]
+        # [(rows with more than k neighbors, their k-th neighbors)]
+        self.slots = []
+        for k in range(int(sorted_degrees[0]) if self.size else 0):
+            rows = int(np.count_nonzero(sorted_degrees > k))
+            self.slots.append(
+                (rows, self.neighbors[self.offsets[self.order[:rows]] + k])
+            )
+
+    def multiply(self, vectors):
+        """
+        The product A @ vectors for a (vertex count, batch) matrix.
+        """
+        result = np.zeros_like(vectors)
+        for rows, columns in self.slots:
+            result[:rows] += vectors[columns]
+        # The slots were accumulated in degree order; put the rows back.
+        unsorted = np.empty_like(result)
+        unsorted[self.order] = result
+        return unsorted
+
+
+def _start_vectors(vertex_count, start_ids):
+    vectors = np.zeros((vertex_count, len(start_ids)), dtype=np.int64)
+    vectors[start_ids, np.arange(len(start_ids))] = 1
+    return vectors
+
+
+def walk_counts(adjacency, start_ids, max_length):
+    """
+    Count the walks of each length from a batch of start words to every
+    word, with one sparse product per length. Walks may revisit words.
+
+    Args:
+        adjacency (Adjacency): The graph's adjacency matrix.
+        start_ids [int]: The vertex ids to count from.
+        max_length (int): The longest walk (in steps) to count.
+
+    Yields:
+        (np.ndarray): For each length 0 to `max_length`, a (vertex count,
+            len(start_ids)) matrix where [v, i] is the number of walks of that
+            length from start_ids[i] to v.
+    """
+    vectors = _start_vectors(adjacency.size, start_ids)
+    yield vectors
+    for _ in range(max_length):
+        vectors = adjacency.multiply(vectors)
+        yield vectors
+
+
+def count_solutions(g, queries, batch_size=BATCH_SIZE, adjacency=None):
+    """
+    Count the ways to fill in each ladder: the number of walks of exactly
+    the ladder's length from its start word to its end word. Walks may
+    revisit words (e.g. cat -> cot -> cat -> car), so this is an upper bound
+    on the number of real ladders, not an exact count. Queries are grouped
+    by start word and worked through `batch_size` start words at a time.
+
+    Args:
+        g (csr_graph.CSRGraph): The word graph.
+        queries [(string, string, int)]: (start, end, steps) for each ladder,
+            where steps is the number of moves (words - 1).
+        batch_size (int=BATCH_SIZE): Start words per batch.
+        adjacency (Adjacency=None): The graph's adjacency matrix, if it's
+            already been built.
+
+    Returns:
+        (np.ndarray): The count for each query (0 if either word isn't in
+            the graph).
+    """
+    adjacency = adjacency or Adjacency(g)
+    results = np.zeros(len(queries), dtype=np.int64)
+    by_start = {}
+    for i, (start, end, steps) in enumerate(queries):
+        if start in g.ids and end in g.ids:
+            by_start.setdefault(g.ids[start], []).append(i)
+
+    start_ids = sorted(by_start)
+    for batch in range(0, len(start_ids), batch_size):
+        batch_ids = start_ids[batch:batch + batch_size]
+        # {steps: ([query index], [end id], [column])}
+        wanted = {}
+        for column, start_id in enumerate(batch_ids):
+            for i in by_start[start_id]:
+                _, end, steps = queries[i]
+                entry = wanted.setdefault(steps, ([], [], []))
+                entry[0].append(i)
+                entry[1].append(g.ids[end])
+                entry[2].append(column)
+
+        for steps, vectors in enumerate(
+                walk_counts(adjacency, batch_ids, max(wanted))):
+            if steps in wanted:
+                indexes, end_ids, columns = wanted[steps]
+                results[indexes] = vectors[end_ids, columns]
+    return results
+
+
+def ladder_solution_counts(g, ladders, batch_size=BATCH_SIZE,
+                           adjacency=None):
+    """
+    count_solutions for a list of ladders (lists of words).
+    """
+    return count_solutions(
+        g,
+        [(ladder[0], ladder[-1], len(ladder) - 1) for ladder in ladders],
+        batch_size,
+        adjacency
+    )
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Count the solutions of every ladder in a generated CSV.'
+    )
+    parser.add_argument('csv_path', help='The generated ladders CSV')
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to load (JSON or binary)'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    g = csr_graph.CSRGraph()
+    g.load_graph(args.graph)
+    with open(args.csv_path, 'r') as input_file:
+        ladders = [
+            row['sequence'].split(' ') for row in csv.DictReader(input_file)
+        ]
+    for ladder, count in zip(ladders, ladder_solution_counts(g, ladders)):
+        print('{} {}'.format(' '.join(ladder), count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+import argparse
+import csv
+import datetime
+import mmap
+import os
+import struct
+
+
+# Schedule index file layout (little-endian):
+#   header:  magic, format version, first date (a proleptic Gregorian
+#            ordinal, see datetime.date.toordinal), day count, record size
+#   records: day count fixed-size records, one per date in order
+#
+# Each record is the rank (float64), the hardness (int16, -1 for a day with
+# no puzzle), the byte length of the sequence (uint16) and the sequence
+# itself (UTF-8 words separated by spaces), padded with zeroes to the record
+# size. The puzzle for a date is at header size + (date - first date) *
+# record size, so the website can seek straight to it.
+SCHEDULE_MAGIC = b'WLDS'
+SCHEDULE_VERSION = 1
+SCHEDULE_HEADER = struct.Struct('<4sIIII')
+RECORD_HEADER = struct.Struct('<dhH4x')
+
+# How hard each weekday's puzzle should be (Monday first), as a position in
+# the remaining ladders ordered from easiest to hardest: 0.0 is the easiest
+# ladder left and 1.0 the hardest.
+WEEKLY_CURVE = (0.0, 0.15, 0.3, 0.45, 0.6, 0.8, 1.0)
+
+SCHEDULE_FIELDS = ['date', 'start', 'end', 'sequence', 'rank', 'hardness']
+
+
+def difficulty_key(row):
+    """
+    Order ladders from easiest to hardest: by hardness (the steps in the
+    shortest ladder), then by rank, since ladders through rarer words (a
+    lower rank) are harder to see.
+    """
+    return (int(row['hardness']), -float(row['rank']))
+
+
+def schedule_ladders(rows, start_date, days, spacing=30, curve=WEEKLY_CURVE):
+    """
+    Assign ladders to consecutive dates.
+
+    Each date gets the unused ladder closest to its weekday's position on the
+    difficulty curve whose start and end words haven't been the start or end
+    of a puzzle in the last `spacing` days. A date is left empty if no ladder
+    fits.
+
+    Args:
+        rows [dict]: Ladder rows from a generated ladders CSV.
+        start_date (datetime.date): The first date to schedule.
+        days (int): The number of dates to schedule.
+        spacing (int=30): The minimum number of days between two puzzles
+            sharing a start or end word.
+        curve (tuple=WEEKLY_CURVE): The difficulty for each weekday.
+
+    Returns:
+        [(datetime.date, dict)]: Each date and its ladder row (None if the
+            date is empty).
+    """
+    # The unused ladders, easiest first. Used ladders are deleted from the
+    # list, which is linear, but there are only a few thousand ladders.
+    remaining = sorted(rows, key=difficulty_key)
+    # {word: the last day index it was a start or end word}
+    last_used = {}
+
+    def available(row, day):
+        return all(
+            day - last_used.get(row[key], -spacing) >= spacing
+            for key in ('start', 'end')
+        )
+
+    schedule = []
+    for day in range(days):
+        date = start_date + datetime.timedelta(days=day)
+        row = None
+        if remaining:
+            target = int(round(curve[date.weekday()] * (len(remaining) - 1)))
+            # Search outwards from the target for the nearest ladder that fits.
+            for offset in range(len(remaining)):
+                candidates = [target - offset, target + offset] \
+                    if offset else [target]
+                found = [
+                    i for i in candidates
+                    if 0 <= i < len(remaining) and available(remaining[i], day)
+                ]
+                if found:
+                    row = remaining.pop(found[0])
+                    last_used[row['start']] = day
+                    last_used[row['end']] = day
+                    break
+                if target - offset < 0 and target + offset >= len(remaining):
+                    break
+        schedule.append((date, row))
+    return schedule
+
+
+def write_schedule_csv(schedule, save_path):
+    """
+    Write the schedule as a CSV of SCHEDULE_FIELDS, skipping empty dates.
+    """
+    with open(save_path, 'w') as write_file:
+        writer = csv.DictWriter(write_file, fieldnames=SCHEDULE_FIELDS)
+        writer.writeheader()
+        for date, row in schedule:
+            if row is None:
+                continue
+            writer.writerow({
+                'date': date.isoformat(),
+                'start': row['start'],
+                'end': row['end'],
+                'sequence': row['sequence'],
+                'rank': row['rank'],
+                'hardness': row['hardness'],
+            })
+
+
+def write_index(schedule, save_path):
+    """
+    Write the schedule as a fixed-record index file (see SCHEDULE_HEADER).
+    The file is written to a temporary path and moved into place.
+
+    Args:
+        schedule [(datetime.date, dict)]: Consecutive dates and their ladder
+            rows, as returned by schedule_ladders.
+        save_path (string): Where to write the index.
+    """
+    sequences = [
+        row['sequence'].encode('utf-8') if row is not None else b''
+        for _, row in schedule
+    ]
+    width = max((len(s) for s in sequences), default=0)
+    # Keep every record 8-byte aligned.
+    record_size = (RECORD_HEADER.size + width + 7) // 8 * 8
+    first = schedule[0][0].toordinal() if schedule else 0
+
+    temp_path = '{}.tmp'.format(save_path)
+    with open(temp_path, 'wb') as output_file:
+        output_file.write(SCHEDULE_HEADER.pack(
+            SCHEDULE_MAGIC, SCHEDULE_VERSION, first, len(schedule),
+            record_size
+        ))
+        for (_, row), sequence in zip(schedule, sequences):
+            if row is None:
+                record = RECORD_HEADER.pack(0.0, -1, 0)
+            else:
+                record = RECORD_HEADER.pack(
+                    float(row['rank']), int(row['hardness']), len(sequence)
+                ) + sequence
+            output_file.write(record.ljust(record_size, b'\0'))
+    os.replace(temp_path, save_path)
+
+
+class ScheduleIndex():
+    """
+    A memory-mapped schedule index (see write_index). Looking up a date reads
+    one record at a fixed offset, without touching the rest of the file.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as input_file:
+            self._mapped = mmap.mmap(
+                input_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+        magic, version, first, self.days, self.record_size = \
+            SCHEDULE_HEADER.unpack_from(self._mapped, 0)
+        if magic != SCHEDULE_MAGIC:
+            raise ValueError('{} is not a schedule index.'.format(path))
+        if version != SCHEDULE_VERSION:
+            raise ValueError(
+                'Unsupported schedule version {} in {}.'.format(version, path)
+            )
+        self.first_date = datetime.date.fromordinal(first) if first else None
+
+    def __len__(self):
+        return self.days
+
+    def puzzle(self, date):
+        """
+        The puzzle scheduled for a date.
+
+        Args:
+            date (datetime.date): The date to look up.
+
+        Returns:
+            (dict): The start, end, sequence (a list of words), rank and
+                hardness, or None if the date is outside the schedule or has
+                no puzzle.
+        """
+        if self.first_date is None:
+            return None
+        day = date.toordinal() - self.first_date.toordinal()
+        if not 0 <= day < self.days:
+            return None
+        position = SCHEDULE_HEADER.size + day * self.record_size
+        rank, hardness, length = \
+            RECORD_HEADER.unpack_from(self._mapped, position)
+        if hardness < 0:
+            return None
+        position += RECORD_HEADER.size
+        sequence = \
+            self._mapped[position:position + length].decode('utf-8').split(' ')
+        return {
+            'start': sequence[0],
+            'end': sequence[-1],
+            'sequence': sequence,
+            'rank': rank,
+            'hardness': hardness,
+        }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    output_path = os.path.join(file_path, '..', 'data', 'output')
+    parser = argparse.ArgumentParser(
+        description=(
+            'Schedule generated ladders as daily puzzles, or look up the '
+            'puzzle for a date.'
+        )
+    )
+    parser.add_argument('command', choices=['build', 'lookup'])
+    parser.add_argument(
+        '--ladders',
+        default=os.path.join(output_path, 'generated_ladders_2.csv'),
+        help='The generated ladders CSV to schedule'
+    )
+    parser.add_argument(
+        '--index',
+        default=os.path.join(output_path, 'schedule.idx'),
+        help='The schedule index file to write or read'
+    )
+    parser.add_argument(
+        '--csv',
+        help='Also write the schedule as a CSV'
+    )
+    parser.add_argument(
+        '--start-date',
+        type=datetime.date.fromisoformat,
+        default=datetime.date.today(),
+        help='The first date to schedule (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--days', type=int, default=730, help='The number of days to schedule'
+    )
+    parser.add_argument(
+        '--spacing',
+        type=int,
+        default=30,
+        help='The minimum days between puzzles sharing a start or end word'
+    )
+    parser.add_argument(
+        '--date',
+        type=datetime.date.fromisoformat,
+        default=datetime.date.today(),
+        help='The date to look up (YYYY-MM-DD)'
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.command == 'lookup':
+        puzzle = ScheduleIndex(args.index).puzzle(args.date)
+        if puzzle is None:
+            print('No puzzle scheduled for {}.'.format(args.date))
+        else:
+            print('{}: {} (hardness {}, rank {})'.format(
+                args.date,
+                ' '.join(puzzle['sequence']),
+                puzzle['hardness'],
+                puzzle['rank']
+            ))
+        return
+
+    with open(args.ladders, 'r') as input_file:
+        rows = list(csv.DictReader(input_file))
+    schedule = schedule_ladders(
+        rows, args.start_date, args.days, args.spacing
+    )
+    write_index(schedule, args.index)
+    if args.csv:
+        write_schedule_csv(schedule, args.csv)
+
+    empty = [date for date, row in schedule if row is None]
+    print('Scheduled {} of {} days from {} into {}.'.format(
+        len(schedule) - len(empty), len(schedule), args.start_date, args.index
+    ))
+    if empty:
+        print('No ladder fit {} days, starting {}.'.format(
+            len(empty), empty[0]
+        ))
+
+
+if __name__ == '__main__':
+    main()
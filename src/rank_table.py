@@ -0,0 +1,96 @@
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+
+def average_rank(word_rankings):
+    """
+    The rank_average used to penalize unranked words. Only words with a
+    rating add to the total, but it's divided by the number of words.
+
+    Args:
+        word_rankings {string: double}: A dict of {word: ranking}.
+
+    Returns:
+        (double): The average ranking.
+    """
+    return sum(
+        i for i in word_rankings.values() if i > 0.0
+    ) / len(word_rankings)
+
+
+def rank_array(g, word_rankings, rank_average):
+    """
+    The ranking of every vertex as an array aligned with g.words, with
+    ladder_builder.calculate_rank's penalty for unranked words
+    (-(rank_average * 2)) already applied.
+
+    Args:
+        g (csr_graph.CSRGraph): The word graph.
+        word_rankings {string: double}: A dict of {word: ranking}.
+        rank_average (double): The average ranking (see average_rank).
+
+    Returns:
+        (np.ndarray): A float64 array of len(g.words) rankings.
+    """
+    penalty = -(rank_average * 2)
+    return np.array(
+        [word_rankings.get(word, penalty) for word in g.words],
+        dtype=np.float64
+    )
+
+
+def calculate_ranks(ranks, ladder_ids):
+    """
+    ladder_builder.calculate_rank for a batch of ladders of the same length.
+
+    The rankings are gathered in one call and summed a column at a time, in
+    the same order calculate_rank adds them, so the results are identical to
+    it (not just within rounding).
+
+    Args:
+        ranks (np.ndarray): The vertex rankings (see rank_array).
+        ladder_ids (np.ndarray): An (ladder count, words per ladder) matrix
+            of vertex ids.
+
+    Returns:
+        (np.ndarray): The rank of each ladder.
+    """
+    ladder_ids = np.asarray(ladder_ids, dtype=np.int64)
+    gathered = ranks[ladder_ids]
+    totals = np.zeros(len(ladder_ids))
+    for column in gathered.T:
+        totals += column
+    return totals / ladder_ids.shape[1]
+
+
+def rank_ladders(g, ranks, ladders):
+    """
+    Rank ladders (lists of words) of any lengths. Ladders are grouped by
+    length and each group is ranked with one calculate_ranks call.
+
+    Args:
+        g (csr_graph.CSRGraph): The word graph. Every word in the ladders
+            must be in it.
+        ranks (np.ndarray): The vertex rankings (see rank_array).
+        ladders [[string]]: The ladders to rank.
+
+    Returns:
+        [double]: The rank of each ladder.
+    """
+    # {length: [ladder index]}
+    by_length = {}
+    for i, ladder in enumerate(ladders):
+        by_length.setdefault(len(ladder), []).append(i)
+
+    results = [0.0] * len(ladders)
+    for length, indexes in by_length.items():
+        words = list(chain.from_iterable(ladders[i] for i in indexes))
+        # itemgetter looks every word up in one call.
+        ids = np.array(
+            itemgetter(*words)(g.ids), dtype=np.int64, ndmin=1
+        ).reshape(len(indexes), length)
+        for i, rank in zip(indexes, calculate_ranks(ranks, ids).tolist()):
+            results[i] = rank
+    return results
@@ -0,0 +1,296 @@
+import argparse
+import os
+import random
+import time
+
+
+def _expand(neighbors, frontier, depths, parents):
+    """
+    Expand one full BFS layer. Every parent on a shortest path is recorded so
+    that all shortest ladders can be recovered later.
+    """
+    depth = depths[frontier[0]] + 1
+    next_frontier = []
+    for vertex in frontier:
+        for child in neighbors(vertex):
+            child_depth = depths.get(child)
+            if child_depth is None:
+                depths[child] = depth
+                parents[child] = [vertex]
+                next_frontier.append(child)
+            elif child_depth == depth:
+                parents[child].append(vertex)
+    return next_frontier
+
+
+def _paths_to(vertex, parents, all_paths):
+    """
+    Walk the parent pointers back from `vertex` to the BFS root. Returns the
+    paths in root-to-vertex order.
+    """
+    if not parents[vertex]:
+        return [[vertex]]
+    if not all_paths:
+        path = [vertex]
+        while parents[vertex]:
+            vertex = parents[vertex][0]
+            path.append(vertex)
+        path.reverse()
+        return [path]
+
+    paths = []
+    for parent in parents[vertex]:
+        for path in _paths_to(parent, parents, all_paths):
+            paths.append(path + [vertex])
+    return paths
+
+
+def shortest_ladders(neighbors, start, end, all_ladders=False):
+    """
+    Find the shortest ladder(s) between two vertices with a bidirectional
+    breadth-first search that always expands the smaller frontier. The graph
+    must be undirected (every edge added with bidirectional=True), since the
+    search from `end` follows the same edges backwards.
+
+    Args:
+        neighbors (function): Returns the adjacent vertices of a vertex.
+        start: The start vertex.
+        end: The end vertex.
+        all_ladders (bool=False): Return every shortest ladder rather than
+            just one.
+
+    Returns:
+        [[vertex]]: The shortest ladders from `start` to `end` (a single one
+            unless `all_ladders` is set), or an empty list if the two vertices
+            aren't connected.
+    """
+    if start == end:
+        return [[start]]
+
+    forward_depths = {start: 0}
+    forward_parents = {start: []}
+    forward_frontier = [start]
+    backward_depths = {end: 0}
+    backward_parents = {end: []}
+    backward_frontier = [end]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier = _expand(
+                neighbors, forward_frontier, forward_depths, forward_parents
+            )
+            new_layer, other_depths = forward_frontier, backward_depths
+        else:
+            backward_frontier = _expand(
+                neighbors, backward_frontier, backward_depths, backward_parents
+            )
+            new_layer, other_depths = backward_frontier, forward_depths
+
+        meeting = [v for v in new_layer if v in other_depths]
+        if not meeting:
+            continue
+
+        # Every shortest ladder crosses the newest layer exactly once, so the
+        # meeting vertices with the smallest total length split the shortest
+        # ladders into a forward half and a backward half.
+        length = min(forward_depths[v] + backward_depths[v] for v in meeting)
+        meeting = [
+            v for v in meeting
+            if forward_depths[v] + backward_depths[v] == length
+        ]
+        if not all_ladders:
+            meeting = meeting[:1]
+
+        ladders = []
+        for vertex in meeting:
+            heads = _paths_to(vertex, forward_parents, all_ladders)
+            tails = _paths_to(vertex, backward_parents, all_ladders)
+            for head in heads:
+                for tail in tails:
+                    ladders.append(head + tail[-2::-1])
+        return ladders
+
+    return []
+
+
+def distance_tree(neighbors, root):
+    """
+    Breadth-first search out from `root` over its whole component. The result
+    answers "how far is this word from `root`" for every word at once, and
+    leads any of them back to `root` along a shortest ladder (see
+    ladders_from_tree).
+
+    Args:
+        neighbors (function): Returns the adjacent vertices of a vertex.
+        root: The vertex to measure distances to.
+
+    Returns:
+        {vertex: int}: The distance from each reachable vertex to `root`.
+    """
+    depths = {root: 0}
+    frontier = [root]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for vertex in frontier:
+            for child in neighbors(vertex):
+                if child not in depths:
+                    depths[child] = depth
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return depths
+
+
+def ladders_from_tree(neighbors, depths, start, all_ladders=False):
+    """
+    Walk down a distance_tree from `start` to its root. Every step moves to a
+    neighbor one closer to the root, so every ladder found is a shortest one.
+    The graph must be undirected (see shortest_ladders).
+
+    Args:
+        neighbors (function): Returns the adjacent vertices of a vertex.
+        depths {vertex: int}: The output of distance_tree.
+        start: The start vertex.
+        all_ladders (bool=False): Return every shortest ladder rather than
+            just one.
+
+    Returns:
+        [[vertex]]: The shortest ladders from `start` to the root, or an
+            empty list if `start` isn't in the tree.
+    """
+    depth = depths.get(start)
+    if depth is None:
+        return []
+    if not all_ladders:
+        ladder = [start]
+        vertex = start
+        while depth:
+            depth -= 1
+            vertex = next(
+                n for n in neighbors(vertex) if depths.get(n) == depth
+            )
+            ladder.append(vertex)
+        return [ladder]
+
+    if not depth:
+        return [[start]]
+    return [
+        [start] + ladder
+        for child in neighbors(start) if depths.get(child) == depth - 1
+        for ladder in ladders_from_tree(neighbors, depths, child, True)
+    ]
+
+
+def solve_batch(g, pairs, all_ladders=False):
+    """
+    Solve many start/end pairs against one loaded graph.
+
+    Args:
+        g (graph.Graph or csr_graph.CSRGraph): The graph to solve against.
+        pairs [(string, string)]: The start/end pairs to solve.
+        all_ladders (bool=False): Return every shortest ladder for each pair.
+
+    Returns:
+        [list]: One result per pair, in order. Each result is what
+            g.shortest_ladder returns for that pair.
+    """
+    return [
+        g.shortest_ladder(start, end, all_ladders=all_ladders)
+        for start, end in pairs
+    ]
+
+
+def benchmark(g, count=5000, seed=0, all_ladders=False):
+    """
+    Measure solver throughput on random start/end pairs.
+
+    Args:
+        g (graph.Graph or csr_graph.CSRGraph): The graph to solve against.
+        count (int=5000): The number of pairs to solve.
+        seed (int=0): The seed for picking pairs.
+        all_ladders (bool=False): Enumerate every shortest ladder.
+
+    Returns:
+        (dict): The number of pairs, how many were solvable and the pairs
+            solved per second.
+    """
+    rng = random.Random(seed)
+    words = sorted(g.vertices())
+    pairs = [(rng.choice(words), rng.choice(words)) for _ in range(count)]
+
+    begin = time.perf_counter()
+    results = solve_batch(g, pairs, all_ladders)
+    elapsed = time.perf_counter() - begin
+
+    return {
+        'pairs': count,
+        'solved': sum(1 for r in results if r),
+        'seconds': elapsed,
+        'pairs_per_second': count / elapsed if elapsed else 0.0,
+    }
+
+
+def build_parser():
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description='Solve word ladders or measure solver throughput.'
+    )
+    parser.add_argument(
+        '--graph',
+        default=os.path.join(file_path, '..', 'data', 'graph_data', 'graph.json'),
+        help='The graph file to load (JSON or binary)'
+    )
+    parser.add_argument('start', nargs='?', help='The start word')
+    parser.add_argument('end', nargs='?', help='The end word')
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='Print every shortest ladder instead of just one'
+    )
+    parser.add_argument(
+        '--benchmark',
+        type=int,
+        default=0,
+        help='Solve this many random pairs and report throughput'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def main():
+    import components
+    import csr_graph
+    import graph
+
+    args = build_parser().parse_args()
+
+    if args.benchmark:
+        dict_graph = graph.Graph()
+        dict_graph.load_graph(args.graph)
+        compact_graph = csr_graph.CSRGraph()
+        compact_graph.load_graph(args.graph)
+        index = components.ComponentIndex.load_or_compute(
+            compact_graph, args.graph
+        )
+        for name, g in (('Graph', dict_graph), ('CSRGraph', compact_graph)):
+            g.components = index
+            results = benchmark(g, args.benchmark, args.seed, args.all)
+            print('{}: {}'.format(name, ', '.join(
+                '{}: {}'.format(key, value) for key, value in results.items()
+            )))
+        return
+
+    g = csr_graph.CSRGraph()
+    g.load_graph(args.graph)
+    g.components = components.ComponentIndex.load_or_compute(g, args.graph)
+    result = g.shortest_ladder(args.start, args.end, all_ladders=args.all)
+    if args.all:
+        for ladder in result:
+            print(' '.join(ladder))
+    else:
+        print(' '.join(result))
+
+
+if __name__ == '__main__':
+    main()
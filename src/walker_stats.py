@@ -0,0 +1,87 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class WalkerStats(dict):
+    """
+    Opt-in counters for the ladder generation hot path. The walkers and the
+    generator take a `stats` argument that defaults to None, and every update
+    is behind an `if stats is not None` check, so leaving it off costs next to
+    nothing.
+
+    Counters are stored as plain dict items (e.g. stats['restarts']) so the
+    walkers can update them without a method call. Keys in PEAK_KEYS hold a
+    maximum instead of a running total. Time spent in each stage of a run and
+    the number of ladders dropped by each filter are kept separately.
+    """
+    PEAK_KEYS = ('peak_stack', 'peak_depth')
+
+    def __init__(self):
+        super().__init__()
+        # {stage name: seconds}
+        self.stages = {}
+        # {filter name: ladders rejected}
+        self.rejected = {}
+
+    def add(self, key, count=1):
+        self[key] = self.get(key, 0) + count
+
+    def peak(self, key, value):
+        if value > self.get(key, 0):
+            self[key] = value
+
+    def reject(self, name, count=1):
+        """
+        Count ladders dropped by the filter called `name`.
+        """
+        self.rejected[name] = self.rejected.get(name, 0) + count
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block of the run, adding to any earlier time for `name`:
+
+            with stats.stage('load_graph'):
+                g.load_graph(path)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = \
+                self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def merge(self, other):
+        """
+        Fold in the stats from another WalkerStats (e.g. from a worker
+        process).
+        """
+        for key, value in other.items():
+            if key in self.PEAK_KEYS:
+                self.peak(key, value)
+            else:
+                self.add(key, value)
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, count in other.rejected.items():
+            self.reject(name, count)
+
+    def summary(self, **run_info):
+        """
+        Everything recorded, as a JSON-serializable dict. Any keyword
+        arguments (e.g. the seed or step count) are included as-is.
+        """
+        summary = {'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        summary.update(run_info)
+        summary['counters'] = dict(self)
+        summary['stages'] = dict(self.stages)
+        summary['rejected'] = dict(self.rejected)
+        return summary
+
+    def write_jsonl(self, path, **run_info):
+        """
+        Append the summary for this run as one line of a JSON-lines file.
+        """
+        with open(path, 'a') as output_file:
+            output_file.write(json.dumps(self.summary(**run_info)) + '\n')
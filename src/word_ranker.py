@@ -1,9 +1,44 @@
+import argparse
+import bz2
+import codecs
 import csv
+import gzip
 import json
-from glob import glob
+import locale
+import lzma
+import mmap
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import os
 
 
+PUNCTUATION = '''!()-[]{};:'"\\,<>./?@#$%^&*_~'''
+# Deletes every punctuation character from a single word.
+_PUNCTUATION_TABLE = str.maketrans('', '', PUNCTUATION)
+# Deletes every punctuation character from a block of text (str.translate is
+# slow on long non-ASCII strings, so use a regex there).
+_PUNCTUATION_PATTERN = re.compile('[{}]+'.format(re.escape(PUNCTUATION)))
+# Whitespace that str.strip would remove from a word but that doesn't split
+# words (tabs, non-breaking spaces, ...).
+_INNER_WHITESPACE = re.compile('[^\\S \r\n]')
+
+# How to open each kind of sample file. Compressed files are decompressed as
+# they're read, without writing anything to disk.
+OPENERS = {
+    '.txt': open,
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+# Sample text is read this many characters (or, through mmap, bytes) at a
+# time.
+CHUNK_SIZE = 16 * 1024 * 1024
+# Plain text files at least this big are read through mmap.
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
 class WordRank:
     """
     A class for representing word rankings. WordRank stores a word along with
@@ -43,12 +78,159 @@ def clean_word(word):
     Returns:
         string: The result of cleaning the input word.
     """
-    punctuation = '''!()-[]{};:'"\,<>./?@#$%^&*_~'''
-    word = word.strip().lower()
-    for element in word:
-        if element in punctuation:
-            word = word.replace(element, '')
-    return word
+    return word.strip().lower().translate(_PUNCTUATION_TABLE)
+
+
+def _split_words(text):
+    """
+    Split text on spaces and line breaks (the same words as splitting each
+    line on spaces).
+    """
+    return text.replace('\r', ' ').replace('\n', ' ').split(' ')
+
+
+def _clean_inner_whitespace_words(text):
+    """
+    Run clean_word over just the words that contain inner whitespace (see
+    _INNER_WHITESPACE), leaving the rest of the text alone.
+    """
+    pieces = []
+    last = 0
+    for match in _INNER_WHITESPACE.finditer(text):
+        position = match.start()
+        if position < last:
+            continue
+        start = max(
+            text.rfind(separator, last, position) for separator in ' \r\n'
+        ) + 1
+        start = max(start, last)
+        ends = [
+            text.find(separator, position) for separator in ' \r\n'
+        ]
+        end = min([e for e in ends if e != -1], default=len(text))
+        pieces.append(text[last:start])
+        pieces.append(text[start:end].strip().translate(_PUNCTUATION_TABLE))
+        last = end
+    pieces.append(text[last:])
+    return ''.join(pieces)
+
+
+def tokenize(text):
+    """
+    Split a block of text into cleaned words. This gives the same words as
+    splitting every line on spaces and calling clean_word on each piece, but
+    cleans the whole block at once where it can.
+
+    Args:
+        text (string): The text to tokenize.
+
+    Returns:
+        [string]: The cleaned words (some may be empty).
+    """
+    text = text.lower()
+    # Stripping has to happen before punctuation is removed for words like
+    # "\t(-\tb", so clean those few words in place first. Their cleaned
+    # form has no punctuation left for the pass below to remove.
+    if _INNER_WHITESPACE.search(text):
+        text = _clean_inner_whitespace_words(text)
+    return _split_words(_PUNCTUATION_PATTERN.sub('', text))
+
+
+def find_sample_files(dir_path):
+    """
+    Find every sample file (see OPENERS) in a directory and its
+    subdirectories.
+
+    Args:
+        dir_path (string): The directory to search.
+
+    Returns:
+        [string]: The file paths, a directory's own files before its
+            subdirectories'.
+    """
+    files = []
+    for root, _, names in os.walk(dir_path):
+        files.extend(
+            os.path.join(root, name) for name in names
+            if os.path.splitext(name)[1] in OPENERS
+        )
+    return files
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Read a sample file as a stream of text chunks. Compressed files are
+    decompressed on the fly, and plain files of MMAP_THRESHOLD bytes or more
+    are read through mmap. Chunks can end in the middle of a word.
+
+    Args:
+        path (string): The file to read.
+        chunk_size (int=CHUNK_SIZE): The size of each chunk.
+
+    Yields:
+        (string): The file's text, a chunk at a time.
+    """
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    if opener is open and os.path.getsize(path) >= MMAP_THRESHOLD:
+        # Decode with the same encoding open() would use. The incremental
+        # decoder holds on to characters split across two chunks.
+        decoder = codecs.getincrementaldecoder(
+            locale.getpreferredencoding(False)
+        )()
+        with open(path, 'rb') as input_file:
+            with mmap.mmap(
+                    input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for position in range(0, len(mapped), chunk_size):
+                    yield decoder.decode(
+                        mapped[position:position + chunk_size]
+                    )
+        yield decoder.decode(b'', final=True)
+        return
+
+    with opener(path, 'rt') as input_file:
+        while True:
+            chunk = input_file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _count_words(counts, text, target_length):
+    if target_length is None:
+        counts.update(word for word in tokenize(text) if word)
+    else:
+        counts.update(
+            word for word in tokenize(text) if len(word) == target_length
+        )
+
+
+def count_words_in_file(path, target_length=5, chunk_size=CHUNK_SIZE):
+    """
+    Count the words of a given length in a sample file (see read_chunks). The
+    text is tokenized a chunk at a time; the piece of a word at the end of
+    one chunk is carried over to the next, so the counts are the same as
+    reading the whole file at once.
+
+    Args:
+        path (string): The file to read.
+        target_length (int=5): The length of words to count. If None, every
+            (non-empty) word is counted.
+        chunk_size (int=CHUNK_SIZE): The size of each chunk.
+
+    Returns:
+        (Counter): {word: count}, in order of first occurrence.
+    """
+    counts = Counter()
+    carry = ''
+    for chunk in read_chunks(path, chunk_size):
+        text = carry + chunk
+        # Words are only split on spaces and line breaks (see _split_words).
+        end = max(text.rfind(' '), text.rfind('\r'), text.rfind('\n')) + 1
+        carry = text[end:]
+        if end:
+            _count_words(counts, text[:end], target_length)
+    _count_words(counts, carry, target_length)
+    return counts
 
 
 def rank_words(words, total):
@@ -77,24 +259,29 @@ def rank_words(words, total):
             rank_max = word.rank
     # Normalize the rankings between 0 and 1.
     for word in word_list:
-        word.rank = (word.rank - rank_min) / (rank_max - rank_min)
+        if rank_max > rank_min:
+            word.rank = (word.rank - rank_min) / (rank_max - rank_min)
+        else:
+            # Every word is equally common (e.g., there's only one).
+            word.rank = 1.0
     word_list.sort()
     return word_list
 
 
-def load_words_csv(file):
+def load_words_csv(file, target_length=5):
     """
     Load words from a CSV file into a WordRank representation.
 
     Args:
         file (string): The input file path.
+        target_length (int=5): The length of words to rank.
 
     Returns:
         (dict): A dictionary of {word: WordRank}.
     """
     # str: WordRank
     words = {}
-    # Just count five letter words.
+    # Just count words of the target length.
     word_count_total = 0
     with open(file, 'r') as word_file:
         reader = csv.DictReader(word_file)
@@ -104,7 +291,7 @@ def load_words_csv(file):
             for word in split_words:
                 word_count_total += 1
                 word = clean_word(word)
-                if len(word) == 5:
+                if len(word) == target_length:
                     if word in words:
                         words[word].count += 1
                     else:
@@ -115,11 +302,11 @@ def load_words_csv(file):
     return word_list
 
 
-def load_words_in_directory(dir_path, target_length=5):
+def load_words_in_directory(dir_path, target_length=5, jobs=1):
     """
-    Iterates through files in a directory and reads all text files, then loads
-    the strings into a list. Note: the directory loading is not recursive, so
-    all files need to be at the same hierarchical level.
+    Iterates through files in a directory (and its subdirectories) and reads
+    all text files, compressed or not (see find_sample_files), then loads the
+    strings into a list.
 
     Args:
         dir_path (string): The path to search for text files in.
@@ -127,37 +314,156 @@ def load_words_in_directory(dir_path, target_length=5):
         ladders generally just operate on words with the same length, so we
         cut out unnecessary compute by reducing our problem space assuming
         this invariant.
+        jobs (int=1): The number of processes to count files with. Each file
+        is counted separately and the counts are merged in file order, so
+        the result doesn't depend on this.
     """
-    words = {}
+    counts = count_words_in_directory(dir_path, target_length, jobs)
+
     # Only count words for comparison of the same length rather than every
     # word.
-    word_count_total = 0
-    files = glob(dir_path + '/*.txt')
-    for f in files:
-        with open(f, 'r') as input_file:
-            for line in input_file:
-                for word in line.split(' '):
-                    word = clean_word(word)
-                    if len(word) == target_length:
-                        word_count_total += 1
-                        if word in words:
-                            words[word].count += 1
-                        else:
-                            w = WordRank(word, count=1)
-                            words[word] = w
+    word_count_total = sum(counts.values())
+    words = {
+        word: WordRank(word, count=count) for word, count in counts.items()
+    }
     word_list = rank_words(words, word_count_total)
     return word_list
 
 
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Rank words by how often they appear in sample text.'
+    )
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument(
+        '--samples',
+        default=os.path.join(
+            file_path, '..', 'data', 'writing_samples', 'files'
+        ),
+        help=(
+            'The directory of sample text to rank words from (.txt, .gz, '
+            '.bz2 or .xz files, searched recursively)'
+        )
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='The number of processes to count files with'
+    )
+    parser.add_argument(
+        '--lengths',
+        type=int,
+        nargs='+',
+        default=None,
+        help=(
+            'Rank each of these word lengths in one pass and write them to '
+            'word_rank_by_length.json'
+        )
+    )
+    return parser
+
+
+def count_words_in_directory(dir_path, target_length=5, jobs=1):
+    """
+    Count words in every sample file in a directory and its subdirectories
+    (see find_sample_files), merging the per-file counts in file order.
+
+    Args:
+        dir_path (string): The path to search for text files in.
+        target_length (int=5): The length of words to count, or None to count
+            every word.
+        jobs (int=1): The number of processes to count files with.
+
+    Returns:
+        (Counter): {word: count}, in order of first occurrence.
+    """
+    files = find_sample_files(dir_path)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            file_counts = list(pool.map(
+                count_words_in_file, files, [target_length] * len(files)
+            ))
+    else:
+        file_counts = [count_words_in_file(f, target_length) for f in files]
+
+    counts = Counter()
+    for file_count in file_counts:
+        counts.update(file_count)
+    return counts
+
+
+def load_words_by_length(dir_path, lengths=None, jobs=1):
+    """
+    Rank words of several lengths with a single pass over the text files in a
+    directory. Each length is ranked on its own, exactly as if
+    load_words_in_directory had been run for that length.
+
+    Args:
+        dir_path (string): The path to search for text files in.
+        lengths ([int]=None): The word lengths to rank. Ranks every length
+            found if None.
+        jobs (int=1): The number of processes to count files with.
+
+    Returns:
+        {int: [WordRank]}: The ranked words for each length.
+    """
+    counts = count_words_in_directory(dir_path, None, jobs)
+
+    buckets = {}
+    for word, count in counts.items():
+        length = len(word)
+        if lengths is not None and length not in lengths:
+            continue
+        if length not in buckets:
+            buckets[length] = {}
+        buckets[length][word] = WordRank(word, count=count)
+
+    ranked = {}
+    for length in sorted(buckets):
+        words = buckets[length]
+        total = sum(w.count for w in words.values())
+        ranked[length] = rank_words(words, total)
+    return ranked
+
+
+def _report_throughput(sample_bytes, seconds):
+    print('Read {} bytes of samples in {:.2f}s ({:.1f} MB/s)'.format(
+        sample_bytes, seconds, sample_bytes / max(seconds, 1e-9) / 1e6
+    ))
+
+
 def main():
     """
     Generate word rankings based on word frequency from sampled text.
     The objective is to avoid using words that are rare or otherwise
     unknown.
     """
+    args = build_parser().parse_args()
     file_path = os.path.dirname(os.path.abspath(__file__))
-    words = os.path.join(file_path, '..', 'data', 'writing_samples', 'files')
+    samples_path = args.samples
+    sample_bytes = sum(
+        os.path.getsize(path) for path in find_sample_files(samples_path)
+    )
+    begin = time.perf_counter()
+
+    if args.lengths:
+        ranked = load_words_by_length(samples_path, args.lengths, args.jobs)
+        _report_throughput(sample_bytes, time.perf_counter() - begin)
+        json_output = {
+            str(length): {word.word: word.rank for word in words}
+            for length, words in ranked.items()
+        }
+        word_rank_path = os.path.join(
+            file_path, '..', 'data', 'word_rankings', 'word_rank_by_length.json'
+        )
+        with open(word_rank_path, 'w') as output_file:
+            json.dump(json_output, output_file)
+        return
+
     # words = load_words_in_directory('/Users/nickrogers/Developer/word_ladder/data/writing_samples/files')
+    words = load_words_in_directory(samples_path, jobs=args.jobs)
+    _report_throughput(sample_bytes, time.perf_counter() - begin)
     json_output = {}
     for word in words:
         json_output[word.word] = word.rank